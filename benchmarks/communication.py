@@ -0,0 +1,69 @@
+"""
+Reports how many bytes a simulation puts on the wire (classes/comm_log.py) over a grid of process counts
+and byzantine counts, for the object engine and the auth engine with nested or flat signature chains. For
+every scenario it prints the messages, contents, serialized bytes and signature bytes of every round, so
+the growth of signature chains with the round (one relay per round) shows next to the value payload.
+With --output every sender -> receiver pair of every round is written as one CSV row for plotting.
+
+run from the repository root:  python -m benchmarks.communication --procs 4-7 --byz 1-2 --output comm.csv
+"""
+
+import argparse
+import csv
+from itertools import product
+
+from classes.Auth.auth_eig_sim import AuthEIGByzSim
+from classes.Auth.signature_chain import CHAIN_FORMATS
+from classes.Auth.signer import get_signer
+from classes.comm_log import CommLog, PairRecord
+from classes.eig_sim import EIGByzSim
+from classes.sweep import is_valid_scenario, parse_int_list
+
+CONFIGS = ('object',) + tuple(f'auth-{chain_format}' for chain_format in CHAIN_FORMATS)
+LIE_PROB = 50
+
+
+def run_logged(config: str, proc_count: int, byz_proc_count: int, seed: int, signer: str) -> CommLog:
+    if config == 'object':
+        sim = EIGByzSim(proc_count, byz_proc_count, byz_prob=LIE_PROB, seed=seed)
+    else:
+        chain_format = config.split('-', 1)[1]
+        sim = AuthEIGByzSim(proc_count, byz_proc_count, byz_prob=LIE_PROB, signer=get_signer(signer),
+                            chain_format=chain_format, seed=seed)
+    comm_log = CommLog()
+    sim.apply_algo(save_step_plot=False, save_decision_plot=False, comm_log=comm_log)
+    return comm_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description='report the serialized bytes of EIGByz simulations')
+    parser.add_argument('--configs', default=','.join(CONFIGS), help=f'comma separated, from {CONFIGS}')
+    parser.add_argument('--procs', type=parse_int_list, default=[4, 5, 6], help='process counts, e.g. 4-7')
+    parser.add_argument('--byz', type=parse_int_list, default=[1, 2], help='byzantine process counts, e.g. 1-2')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--signer', choices=['cryptidy', 'ed25519', 'hmac'], default='hmac',
+                        help='signature backend of the auth configs')
+    parser.add_argument('--output', default=None, help='CSV file for the per pair records')
+    args = parser.parse_args()
+    configs = args.configs.split(',')
+    for config in configs:
+        if config not in CONFIGS:
+            raise ValueError(f'unknown config {config}, expected one of {CONFIGS}')
+    rows = []
+    for config, proc_count, byz_proc_count in product(configs, args.procs, args.byz):
+        if not is_valid_scenario(proc_count, byz_proc_count):
+            continue
+        comm_log = run_logged(config, proc_count, byz_proc_count, args.seed, args.signer)
+        print(f'\n{config}  n={proc_count}  f={byz_proc_count}')
+        print(comm_log.format_table())
+        rows += [(config, proc_count, byz_proc_count) + tuple(record) for record in comm_log.get_records()]
+    if args.output is not None:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('config', 'proc_count', 'byz_proc_count') + PairRecord._fields)
+            writer.writerows(rows)
+        print(f'\n{len(rows)} pair records written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures the memory allocated by the message layer in every round of an EIGByz run and checks it against a
+budget. Only message generation (one round message per process plus the per-recipient copies) and
+message application are traced, tree construction is not.
+
+run from the repository root:  python -m benchmarks.message_allocations
+"""
+
+import sys
+import tracemalloc
+
+from classes.array_eig_tree import ArrayEIGByzTree
+from classes.eig_index import get_level_size
+from classes.eig_tree import EIGByzTree
+from classes.process import Process
+from classes.sim_random import draw_byz_proc_uids, draw_initial_vals, spawn_rngs
+
+# allowed allocation per round: a few bytes for every value a process sends or receives and a fixed
+# overhead for every message object
+BUDGET_BYTES_PER_VALUE = 4
+BUDGET_BYTES_PER_MESSAGE = 1024
+
+
+def get_round_budget(proc_count: int, level: int) -> int:
+    values = proc_count * proc_count * get_level_size(proc_count, level)
+    return BUDGET_BYTES_PER_VALUE * values + BUDGET_BYTES_PER_MESSAGE * proc_count * proc_count
+
+
+def measure_round_allocations(proc_count: int, byz_proc_count: int, tree_type: type,
+                              step_number: int = None) -> list[tuple[int, int, int]]:
+    if step_number is None:
+        step_number = byz_proc_count + 1
+    rng, proc_rngs = spawn_rngs(0, proc_count)
+    byz_uids = draw_byz_proc_uids(rng, proc_count, byz_proc_count)
+    vals = draw_initial_vals(rng, proc_count)
+    processes = [Process(uid, proc_count, vals[uid - 1], is_byz=uid in byz_uids, tree_type=tree_type,
+                         rng=proc_rngs[uid - 1]) for uid in range(1, proc_count + 1)]
+    res = []
+    for round_number in range(1, step_number + 1):
+        tracemalloc.start()
+        round_msgs = [p.generate_round_msg() for p in processes]
+        for receiver in processes:
+            receiver.receive_msgs([p.generate_msg(msg) for p, msg in zip(processes, round_msgs)])
+        send_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        for p in processes:
+            p.add_tree_level()
+        tracemalloc.start()
+        for p in processes:
+            p.apply_msgs(round_number)
+        apply_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        res.append((round_number, send_bytes, apply_bytes))
+    return res
+
+
+def main() -> int:
+    over_budget = False
+    print(f'{"tree":<16}{"n":>4}{"f":>4}{"round":>7}{"send KiB":>11}{"apply KiB":>11}{"budget KiB":>12}')
+    for tree_type in (EIGByzTree, ArrayEIGByzTree):
+        for proc_count, byz_proc_count in ((4, 1), (7, 2), (10, 3)):
+            for round_number, send_bytes, apply_bytes in measure_round_allocations(proc_count, byz_proc_count,
+                                                                                   tree_type):
+                budget = get_round_budget(proc_count, round_number - 1)
+                over = max(send_bytes, apply_bytes) > budget
+                over_budget |= over
+                print(f'{tree_type.__name__:<16}{proc_count:>4}{byz_proc_count:>4}{round_number:>7}'
+                      f'{send_bytes / 1024:>11.1f}{apply_bytes / 1024:>11.1f}{budget / 1024:>12.1f}'
+                      f'{"  over budget" if over else ""}')
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
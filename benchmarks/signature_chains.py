@@ -0,0 +1,62 @@
+"""
+Compares the nested and flat signature chain formats (classes/Auth/signature_chain.py) for a value relayed
+through f + 1 processes, the longest chain of an authenticated EIG run with f byzantine processes. For every
+backend and depth it prints the bytes of signature data of the chain, the time to build it hop by hop and
+the time to verify it once without a verification cache.
+
+run from the repository root:  python -m benchmarks.signature_chains [--signers hmac,ed25519,cryptidy]
+"""
+
+import argparse
+import time
+
+from classes.Auth.signature_chain import extend_chain, FLAT_CHAIN, get_chain_size, NESTED_CHAIN
+from classes.Auth.signer import get_signer
+from classes.Auth.verification_cache import VerificationCache
+
+
+def measure_chain(signer_name: str, chain_format: str, depth: int, repetitions: int) -> tuple[int, float, float]:
+    # returns (chain bytes, build seconds, verify seconds), times are the mean of the repetitions
+    signer = get_signer(signer_name)
+    keys = [signer.generate_keys() for _ in range(depth)]
+    verify_keys = [verify_key for verify_key, _ in keys]
+    signers = tuple(range(1, depth + 1))
+    build_time = verify_time = 0
+    chain = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        chain = None
+        for hop in range(1, depth + 1):
+            chain = extend_chain(signer, chain_format, keys[hop - 1][1], 1, chain, signers[:hop])
+        build_time += time.perf_counter() - start
+        start = time.perf_counter()
+        cache = VerificationCache(maxsize=0)  # measures the verification itself, nothing is kept
+        if chain_format == NESTED_CHAIN:
+            val = cache.verify_chain(signer, verify_keys, signers, chain)
+        else:
+            cache.verify_flat_chain(signer, verify_keys, signers, 1, chain)
+            val = 1
+        verify_time += time.perf_counter() - start
+        if val != 1:
+            raise ValueError(f'{signer_name} {chain_format} chain of depth {depth} verified to {val}')
+    return get_chain_size(chain), build_time / repetitions, verify_time / repetitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='compare nested and flat signature chains')
+    parser.add_argument('--signers', default='hmac,ed25519', help='comma separated backends, e.g. hmac,cryptidy')
+    parser.add_argument('--byz', default='1,2,3,4', help='comma separated byzantine counts, depth is f + 1')
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+    print(f'{"signer":<10}{"f":>3}{"depth":>7}{"format":>8}{"bytes":>10}{"build ms":>11}{"verify ms":>11}')
+    for signer_name in args.signers.split(','):
+        for byz_proc_count in [int(f) for f in args.byz.split(',')]:
+            depth = byz_proc_count + 1
+            for chain_format in (NESTED_CHAIN, FLAT_CHAIN):
+                size, build_time, verify_time = measure_chain(signer_name, chain_format, depth, args.repetitions)
+                print(f'{signer_name:<10}{byz_proc_count:>3}{depth:>7}{chain_format:>8}{size:>10}'
+                      f'{build_time * 1000:>11.3f}{verify_time * 1000:>11.3f}')
+
+
+if __name__ == '__main__':
+    main()
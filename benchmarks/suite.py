@@ -0,0 +1,250 @@
+"""
+Scaling benchmarks of both simulators over a grid of process counts, byzantine counts and rounds. For every
+engine it measures the phases of a run separately (tree construction with add_level, message generation,
+message application and decide; for the auth engine generation is where round messages are signed and
+application is where signatures are verified) and the end-to-end apply_algo with plotting off.
+
+Every measurement reports the best wall time of --repeat seeded runs, and from one more traced run the peak
+traced memory and the number of memory blocks the measured code left allocated. Results are written as
+JSON; with --baseline they are compared with an earlier result file and slower or larger measurements are
+flagged (exit code 1), --update-baseline stores the results as the new baseline.
+
+run from the repository root, e.g.:
+    python -m benchmarks.suite --procs 4-6 --byz 1-2 --output bench.json --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from itertools import product
+
+from classes.array_eig_tree import ArrayEIGByzTree
+from classes.Auth.auth_eig_sim import AuthEIGByzSim
+from classes.Auth.signer import get_signer
+from classes.eig_tree import EIGByzTree
+from classes.process import Process
+from classes.sim_random import draw_byz_proc_uids, draw_initial_vals, spawn_rngs
+from classes.sparse_eig_tree import SparseEIGByzTree
+from classes.sweep import create_sim, is_valid_scenario, parse_int_list, run_sim
+
+ENGINES = ('object', 'array', 'sparse', 'batched', 'auth')
+TREE_TYPES = {'object': EIGByzTree, 'array': ArrayEIGByzTree, 'sparse': SparseEIGByzTree}
+PHASES = ('add_level', 'generate', 'apply', 'decide')
+AUTH_PHASES = {'add_level': 'add_level', 'generate': 'sign', 'apply': 'verify', 'decide': 'decide'}
+LIE_PROB = 50
+KEY_FIELDS = ('case', 'phase', 'engine', 'proc_count', 'byz_proc_count', 'step_number')
+
+
+class PhaseMeter:
+    # adds up the wall time of every phase, or traces its memory when traced is set. tracing slows the
+    # measured code down, so times and memory come from separate runs
+    def __init__(self, traced: bool):
+        self.__traced = traced
+        self.__seconds = {}
+        self.__peak_bytes = {}
+        self.__blocks = {}
+
+    def measure(self, phase: str, func, *args):
+        if self.__traced:
+            tracemalloc.start()
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+            tracemalloc.stop()
+            self.__peak_bytes[phase] = max(self.__peak_bytes.get(phase, 0), peak)
+            self.__blocks[phase] = self.__blocks.get(phase, 0) + blocks
+        else:
+            start = time.perf_counter()
+            func(*args)
+            self.__seconds[phase] = self.__seconds.get(phase, 0) + time.perf_counter() - start
+
+    def get_seconds(self) -> dict[str, float]:
+        return self.__seconds
+
+    def get_memory(self) -> dict[str, tuple[int, int]]:
+        return {phase: (self.__peak_bytes[phase], self.__blocks[phase]) for phase in self.__peak_bytes}
+
+
+def create_processes(engine: str, proc_count: int, byz_proc_count: int, seed: int, signer: str) -> list:
+    # auth processes need their keys and each other's public keys, the simulation sets them up
+    if engine == 'auth':
+        return AuthEIGByzSim(proc_count, byz_proc_count, byz_prob=LIE_PROB, signer=get_signer(signer),
+                             seed=seed).get_processes()
+    rng, proc_rngs = spawn_rngs(seed, proc_count)
+    byz_uids = draw_byz_proc_uids(rng, proc_count, byz_proc_count)
+    vals = draw_initial_vals(rng, proc_count)
+    return [Process(uid, proc_count, vals[uid - 1], is_byz=uid in byz_uids, lie_prob=LIE_PROB,
+                    tree_type=TREE_TYPES[engine], rng=proc_rngs[uid - 1]) for uid in range(1, proc_count + 1)]
+
+
+def run_phases(processes: list, step_number: int, meter: PhaseMeter):
+    # the rounds of apply_algo, phase by phase
+    def generate():
+        round_msgs = [p.generate_round_msg() for p in processes]
+        for receiver in processes:
+            receiver.receive_msgs([p.generate_msg(msg) for p, msg in zip(processes, round_msgs)])
+
+    def add_level():
+        for p in processes:
+            p.add_tree_level()
+
+    def apply(round_number: int):
+        for p in processes:
+            p.apply_msgs(round_number)
+
+    def decide():
+        for p in processes:
+            p.decide(vectorized=True)
+
+    for round_number in range(1, step_number + 1):
+        meter.measure('generate', generate)
+        meter.measure('add_level', add_level)
+        meter.measure('apply', apply, round_number)
+    meter.measure('decide', decide)
+
+
+def bench_phases(engine: str, proc_count: int, byz_proc_count: int, step_number: int, repeat: int, seed: int,
+                 signer: str) -> list[dict]:
+    best = {}
+    for _ in range(repeat):
+        meter = PhaseMeter(traced=False)
+        run_phases(create_processes(engine, proc_count, byz_proc_count, seed, signer), step_number, meter)
+        for phase, seconds in meter.get_seconds().items():
+            best[phase] = min(best.get(phase, seconds), seconds)
+    meter = PhaseMeter(traced=True)
+    run_phases(create_processes(engine, proc_count, byz_proc_count, seed, signer), step_number, meter)
+    memory = meter.get_memory()
+    names = AUTH_PHASES if engine == 'auth' else {phase: phase for phase in PHASES}
+    return [make_result('phase', names[phase], engine, proc_count, byz_proc_count, step_number, best[phase],
+                        *memory[phase]) for phase in PHASES]
+
+
+def bench_apply_algo(engine: str, proc_count: int, byz_proc_count: int, step_number: int, repeat: int, seed: int,
+                     signer: str) -> dict:
+    # the simulation is created outside of the measurement (auth key generation is not part of a run)
+    best = None
+    for _ in range(repeat):
+        sim = create_sim(engine, proc_count, byz_proc_count, LIE_PROB, signer, seed)
+        start = time.perf_counter()
+        run_sim(sim, engine, step_number)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    sim = create_sim(engine, proc_count, byz_proc_count, LIE_PROB, signer, seed)
+    tracemalloc.start()
+    run_sim(sim, engine, step_number)
+    peak = tracemalloc.get_traced_memory()[1]
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    return make_result('apply_algo', 'all', engine, proc_count, byz_proc_count, step_number, best, peak, blocks)
+
+
+def make_result(case: str, phase: str, engine: str, proc_count: int, byz_proc_count: int, step_number: int,
+                seconds: float, peak_bytes: int, blocks: int) -> dict:
+    return {'case': case, 'phase': phase, 'engine': engine, 'proc_count': proc_count,
+            'byz_proc_count': byz_proc_count, 'step_number': step_number, 'seconds': seconds,
+            'peak_bytes': peak_bytes, 'blocks': blocks}
+
+
+def run_suite(engines: list[str], proc_counts: list[int], byz_proc_counts: list[int], step_numbers: list[int] = None,
+              repeat: int = 3, seed: int = 0, signer: str = 'hmac') -> list[dict]:
+    # step_numbers None means f + 1 rounds, like the sweep. batched runs all processes at once, so it has no
+    # separate phases and is only measured end to end
+    results = []
+    for engine, proc_count, byz_proc_count in product(engines, proc_counts, byz_proc_counts):
+        for step_number in [byz_proc_count + 1] if step_numbers is None else step_numbers:
+            if not is_valid_scenario(proc_count, byz_proc_count, step_number):
+                continue
+            if engine != 'batched':
+                results += bench_phases(engine, proc_count, byz_proc_count, step_number, repeat, seed, signer)
+            results.append(bench_apply_algo(engine, proc_count, byz_proc_count, step_number, repeat, seed, signer))
+            print_results(results[-1:] if engine == 'batched' else results[-len(PHASES) - 1:])
+    return results
+
+
+def result_key(result: dict) -> tuple:
+    return tuple(result[field] for field in KEY_FIELDS)
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float, min_seconds: float) -> list[str]:
+    # a result is flagged if it is more than tolerance slower (and slower by more than min_seconds, below
+    # that timings are noise) or has a more than tolerance higher peak memory than the baseline
+    baseline = {result_key(result): result for result in baseline}
+    flagged = []
+    for result in results:
+        base = baseline.get(result_key(result))
+        if base is None:
+            continue
+        name = ' '.join(str(v) for v in result_key(result))
+        slower = result['seconds'] - base['seconds']
+        if result['seconds'] > base['seconds'] * (1 + tolerance) and slower > min_seconds:
+            flagged.append(f'{name}: {base["seconds"]:.4f}s -> {result["seconds"]:.4f}s '
+                           f'({result["seconds"] / base["seconds"]:.2f}x)')
+        if result['peak_bytes'] > base['peak_bytes'] * (1 + tolerance):
+            flagged.append(f'{name}: peak {base["peak_bytes"] / 1024:.1f} KiB -> '
+                           f'{result["peak_bytes"] / 1024:.1f} KiB')
+    return flagged
+
+
+def print_results(results: list[dict]):
+    for result in results:
+        print(f'{result["case"]:<11}{result["phase"]:<10}{result["engine"]:<8}{result["proc_count"]:>4}'
+              f'{result["byz_proc_count"]:>4}{result["step_number"]:>7}{result["seconds"]:>11.4f}'
+              f'{result["peak_bytes"] / 1024:>12.1f}{result["blocks"]:>10}')
+
+
+def read_results(path: str) -> list[dict]:
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def write_results(path: str, results: list[dict], meta: dict):
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='benchmark the EIGByz simulators over n, f and rounds')
+    parser.add_argument('--engines', default=','.join(ENGINES), help=f'comma separated, from {ENGINES}')
+    parser.add_argument('--procs', type=parse_int_list, default=[4, 5, 6], help='process counts, e.g. 4-7')
+    parser.add_argument('--byz', type=parse_int_list, default=[1, 2], help='byzantine process counts, e.g. 1-2')
+    parser.add_argument('--rounds', type=parse_int_list, default=None, help='round counts, default f + 1')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per measurement, the best one counts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--signer', choices=['cryptidy', 'ed25519', 'hmac'], default='hmac',
+                        help='signature backend of the auth engine')
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--baseline', default=None, help='result file to compare with')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results to --baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown')
+    parser.add_argument('--min-seconds', type=float, default=0.001, help='slowdowns below this are ignored')
+    args = parser.parse_args()
+    engines = args.engines.split(',')
+    for engine in engines:
+        if engine not in ENGINES:
+            raise ValueError(f'unknown engine {engine}, expected one of {ENGINES}')
+    print(f'{"case":<11}{"phase":<10}{"engine":<8}{"n":>4}{"f":>4}{"rounds":>7}{"seconds":>11}{"peak KiB":>12}'
+          f'{"blocks":>10}')
+    results = run_suite(engines, args.procs, args.byz, args.rounds, args.repeat, args.seed, args.signer)
+    meta = {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'repeat': args.repeat, 'seed': args.seed, 'signer': args.signer}
+    write_results(args.output, results, meta)
+    print(f'{len(results)} results written to {args.output}')
+    if args.baseline is None:
+        return 0
+    if args.update_baseline or not os.path.exists(args.baseline):
+        write_results(args.baseline, results, meta)
+        print(f'baseline written to {args.baseline}')
+        return 0
+    flagged = compare(results, read_results(args.baseline), args.tolerance, args.min_seconds)
+    for line in flagged:
+        print(f'regression  {line}')
+    print(f'{len(flagged)} regressions against {args.baseline}')
+    return 1 if flagged else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
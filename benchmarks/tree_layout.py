@@ -0,0 +1,49 @@
+"""
+Compares the level-wise tree layout of classes/tree_layout.py with external/plot_tree.hierarchy_pos on
+full EIG trees. hierarchy_pos needs the networkx graph, its construction is not part of the timing. The
+recursive layout is only run up to --max-reference-nodes nodes, larger trees are laid out by the new one only.
+
+run from the repository root:  python -m benchmarks.tree_layout
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from classes.eig_index import get_level_size
+from classes.tree_layout import eig_hierarchy_pos
+from classes.tree_render import get_layout
+from external.plot_tree import hierarchy_pos
+
+SHAPES = ((5, 3), (6, 4), (7, 4), (8, 4), (9, 4), (9, 5), (10, 5), (10, 6))
+
+
+def get_node_count(proc_count: int, height: int) -> int:
+    return sum(get_level_size(proc_count, level) for level in range(height + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark EIG tree layouts')
+    parser.add_argument('--max-reference-nodes', type=int, default=20000)
+    args = parser.parse_args()
+    print(f'{"n":>4}{"height":>8}{"nodes":>10}{"hierarchy_pos s":>17}{"levels s":>11}{"speedup":>9}{"max diff":>11}')
+    for proc_count, height in SHAPES:
+        nodes = get_node_count(proc_count, height)
+        start = time.perf_counter()
+        x, y = eig_hierarchy_pos(proc_count, height)
+        new_time = time.perf_counter() - start
+        ref_time, diff = float('nan'), float('nan')
+        if nodes <= args.max_reference_nodes:
+            graph = get_layout(proc_count, height)[0]  # int node ids in slot order, the root is 0
+            start = time.perf_counter()
+            pos = hierarchy_pos(graph, 0)
+            ref_time = time.perf_counter() - start
+            ref = np.array([pos[node_id] for node_id in range(nodes)])
+            diff = max(np.abs(ref[:, 0] - x).max(), np.abs(ref[:, 1] - y).max())
+        print(f'{proc_count:>4}{height:>8}{nodes:>10}{ref_time:>17.4f}{new_time:>11.4f}'
+              f'{ref_time / new_time:>9.1f}{diff:>11.1e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Signature verification throughput of an authenticated EIG run for a growing number of verification threads
+per process. The verification cache is disabled, so every content of every round is really checked. Prints
+checked contents per second and per second and thread, on a machine with enough cores the total should
+grow with the threads while the per-thread number stays about the same.
+
+run from the repository root:  python -m benchmarks.verification_throughput [--signer ed25519 --threads 1,2,4]
+"""
+
+import argparse
+import os
+import tempfile
+
+from classes.Auth.auth_eig_sim import AuthEIGByzSim
+from classes.Auth.key_store import KeyStore
+from classes.Auth.signer import get_signer
+from classes.Auth.verification_cache import VerificationCache
+
+
+def measure_throughput(signer_name: str, proc_count: int, byz_proc_count: int, threads: int,
+                       key_store: KeyStore = None) -> dict:
+    sim = AuthEIGByzSim(proc_count, byz_proc_count, signer=get_signer(signer_name), key_store=key_store,
+                        verification_cache=VerificationCache(maxsize=0), verify_threads=threads, seed=0)
+    sim.apply_algo(save_step_plot=False, save_decision_plot=False)
+    return sim.get_verification_log().get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='measure signature verification throughput per thread')
+    parser.add_argument('--signer', default='ed25519')
+    parser.add_argument('--procs', type=int, default=6)
+    parser.add_argument('--byz', type=int, default=2)
+    parser.add_argument('--threads', default='1,2,4')
+    args = parser.parse_args()
+    print(f'{os.cpu_count()} cores, signer {args.signer}, n {args.procs}, f {args.byz}')
+    print(f'{"threads":>8}{"checked":>10}{"seconds":>10}{"per s":>10}{"per s/thread":>14}')
+    # the keys are generated once and shared by the runs of every thread count, in a directory that is
+    # removed afterwards
+    with tempfile.TemporaryDirectory() as key_dir:
+        for threads in [int(t) for t in args.threads.split(',')]:
+            stats = measure_throughput(args.signer, args.procs, args.byz, threads, KeyStore(key_dir))
+            print(f'{threads:>8}{stats["verified"]:>10}{stats["seconds"]:>10.3f}{stats["throughput"]:>10.0f}'
+                  f'{stats["throughput_per_core"]:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,17 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import os
+import numpy as np
+from typing import Iterator, TextIO, TYPE_CHECKING
 
-from classes.Auth.auth_message import AuthMessage, AuthMessageContent
+from classes.eig_decide import auth_decide_levels, NOT_DECIDED, UNAUTHED
+from classes.eig_index import get_append_slots, get_level_paths, get_level_slots, rank_path, NO_VAL
+from classes.Auth.auth_message import AuthFrontierMessage, AuthMessage
 from classes.Auth.auth_node import AuthNode
-from external.plot_tree import hierarchy_pos
+from classes.tree_export import to_networkx, write_log
+from classes.tree_render import plot_tree
+from classes.tree_traversal import check_order, iter_depth_first, LEVEL_ORDER
 
 
-def save_plot(path):
-    generate_file(path)
-    plt.savefig(path)
-
-
-def generate_file(path):
-    dir = os.path.dirname(path)
-    if not os.path.exists(dir):
-        os.makedirs(dir)
+if TYPE_CHECKING:
+    import networkx as nx
 
 
 class AuthEIGByzTree:
@@ -23,7 +19,12 @@ class AuthEIGByzTree:
         self.__proc_uid = proc_uid
         self.__proc_count = proc_count
         self.__root = AuthNode(parent=None, proc_uid=-1, val=proc_val, path=[], is_authed=True, signed_val=None)
+        self.__levels = [[self.__root]]  # nodes of every level in EIG slot order (classes/eig_index.py)
+        self.__vals = [np.array([proc_val], dtype=np.int8)]  # vals of the nodes of every level, NO_VAL for None
+        self.__authed = [np.ones(1, dtype=bool)]  # is_authed of the nodes of every level
+        self.__node_count = 1
         self.__decision = None
+        self.__decisions = None  # level arrays of a vectorized decide that are not written to the nodes yet
 
     def get_proc_uid(self) -> int:
         return self.__proc_uid
@@ -35,45 +36,38 @@ class AuthEIGByzTree:
         return self.__decision
 
     def get_root(self) -> AuthNode:
+        self.__write_decisions()
         return self.__root
 
     def add_level(self):
-        if self.get_root().is_leaf():
-            for i in range(1, self.get_proc_count() + 1):
-                child = AuthNode(parent=self.get_root(), proc_uid=i, val=None, path=[-1, i], is_authed=False,
-                                 signed_val=None)
-                self.get_root().add_child(child)
-        else:
-            for child in self.get_root().get_children():
-                self.__add_level_non_root(node=child)
-
-    def __add_level_non_root(self, node: AuthNode):
-        if node.is_leaf():
-            for i in range(1, self.get_proc_count() + 1):
-                if i not in node.get_path():
-                    new_path = node.get_path() + [i]
-                    child = AuthNode(parent=node, proc_uid=i, val=None, path=new_path, is_authed=False, signed_val=None)
-                    node.add_child(child)
-        else:
-            for child in node.get_children():
-                self.__add_level_non_root(node=child)
-
-    def log(self) -> str:
-        res = ''
-        res += f'root: {self.__root.get_proc_uid()}'
-        if self.__root.is_leaf():
-            return res + f' val: {self.__root.get_val()}'
-        queue = [c for c in self.__root.get_children()]
-        last_depth = 1
-        while len(queue) > 0:
-            node = queue.pop(0)
-            if node.get_depth() != last_depth:
-                last_depth += 1
-                res += '\n'
-            res += node.__str__() + ' ** '
-            if not node.is_leaf():
-                queue = queue + node.get_children()
-        return res
+        # only the frontier gets children: the uid and path of every new slot come from the cached slot
+        # arrays of classes/eig_index.py, in slot order
+        self.__write_decisions()
+        frontier = self.__levels[-1]
+        level = len(self.__levels)
+        parents, uids, _ = get_level_slots(self.__proc_count, level)
+        paths = get_level_paths(self.__proc_count, level)
+        new_level = []
+        for parent, uid, path in zip(parents.tolist(), uids.tolist(), paths.tolist()):
+            child = AuthNode(parent=frontier[parent], proc_uid=uid, val=None, path=[-1] + path,
+                             is_authed=False, signed_val=None)
+            frontier[parent].add_child(child)
+            new_level.append(child)
+        self.__levels.append(new_level)
+        self.__vals.append(np.full(len(new_level), NO_VAL, dtype=np.int8))
+        self.__authed.append(np.zeros(len(new_level), dtype=bool))
+        self.__node_count += len(new_level)
+
+    def iter_nodes(self, order: str = LEVEL_ORDER) -> Iterator[AuthNode]:
+        # lazily yields every node, level by level in slot order or depth first (classes/tree_traversal.py)
+        check_order(order)
+        self.__write_decisions()
+        if order == LEVEL_ORDER:
+            return (node for level in self.__levels for node in level)
+        return iter_depth_first(self.__root)
+
+    def log(self, file: TextIO = None) -> str | None:
+        return write_log(self, lambda level, slot: str(self.__levels[level][slot]), file)
 
     def __str__(self):
         return self.log()
@@ -81,25 +75,14 @@ class AuthEIGByzTree:
     def __repr__(self):
         return self.__str__()
 
-    def convert_to_networkx_graph(self) -> nx.Graph:
-        graph = nx.Graph()
-        graph.add_node('-1')
-        queue = [self.__root]
-        while len(queue) > 0:
-            node = queue.pop(0)
-            path = ''.join(str(p) for p in node.get_path()[1:])
-            if not node.is_root():
-                parent = path[:-1] if len(path) > 1 else '-1'
-                graph.add_edge(parent, path)
-            if not node.is_leaf():
-                queue = queue + node.get_children()
-        return graph
+    def convert_to_networkx_graph(self, id_type: str = 'int') -> 'nx.Graph':
+        return to_networkx(self, id_type)
 
     def get_decision_colors(self) -> list[str]:
+        if self.__decisions is not None:
+            return self.__get_decision_colors_vectorized()
         res = []
-        queue = [self.get_root()]
-        while len(queue) > 0:
-            node = queue.pop(0)
+        for node in self.iter_nodes():
             match node.get_decision():
                 case 1:
                     color = 'lawngreen'
@@ -115,75 +98,114 @@ class AuthEIGByzTree:
                 case _:
                     color = 'lightgray'
             res.append(color)
-            if not node.is_leaf():
-                queue = queue + node.get_children()
         return res
 
+    def __get_decision_colors_vectorized(self) -> list[str]:
+        # the colors above, from the level arrays of a vectorized decide
+        decisions = np.concatenate(self.__decisions)
+        authed = np.concatenate(self.__authed)
+        colors = np.select([decisions == 1, decisions == 0, (decisions == NOT_DECIDED) & authed,
+                            (decisions == NOT_DECIDED) | (decisions == UNAUTHED)],
+                           ['lawngreen', 'crimson', 'deepskyblue', 'yellow'], default='lightgray')
+        return colors.tolist()
+
     def plot_tree(self, fig_size: tuple[int, int] = (75, 10), path: str = None, node_size: int = 1200,
                   show_step_plots: bool = True):
-        graph = self.convert_to_networkx_graph()
-        plt.figure(figsize=fig_size)
-        if self.__root.is_leaf():
-            pos = nx.spring_layout(graph)
-        else:
-            pos = hierarchy_pos(graph, '-1')
-        node_size_list = [node_size] * graph.number_of_nodes()
-        colors = self.get_decision_colors()
-        plt.title(f'process {self.get_proc_uid()} tree plot')
-        nx.draw(graph, pos=pos, with_labels=True, node_size=node_size_list, node_color=colors)
-        if path is not None:
-            save_plot(path)
-        if not show_step_plots:
-            plt.close()
+        plot_tree(self, fig_size=fig_size, path=path, node_size=node_size, show_step_plots=show_step_plots)
 
     def get_tree_height(self) -> int:
-        height = 0
-        node = self.__root
-        while not node.is_leaf():
-            node = node.get_children()[0]
-            height += 1
-        return height
-
-    def get_message(self) -> AuthMessage:
-        if self.get_root().is_leaf():
-            msg_content = AuthMessageContent(self.get_root().get_path(), self.get_root().get_val(),
-                                             bytes(self.get_root().get_val()))
-            return AuthMessage([msg_content], sender=self.get_proc_uid())
-        else:
-            msg_contents = self.__get_messages(self.get_root())
-            return AuthMessage(msg_contents, sender=self.get_proc_uid())
+        return len(self.__levels) - 1
+
+    def get_level_size(self, level: int) -> int:
+        return len(self.__levels[level])
+
+    def get_node_count(self) -> int:
+        return self.__node_count
 
-    def __get_messages(self, node: AuthNode) -> list[AuthMessageContent]:
-        if node.is_leaf():
-            return [AuthMessageContent(node.get_path(), node.get_val(), node.get_signed_val())]
+    def get_frontier(self) -> list[AuthNode]:
+        # nodes of the deepest level, the ones the next add_level and get_message work on
+        return self.__levels[-1].copy()
+
+    def get_message(self) -> AuthFrontierMessage:
+        frontier = self.__levels[-1]
+        vals = self.__vals[-1].copy()
+        if self.get_root().is_leaf():
+            signed_vals = [bytes(self.get_root().get_val())]
         else:
-            msg_contents = []
-            for child in node.get_children():
-                msg_contents += self.__get_messages(child)
-            return msg_contents
-
-    def apply_msg(self, msg: AuthMessage):
-        for msg_content in msg.get_content():
-            if len(msg_content.get_path_list()) == 0:
-                self.__apply_msg_content(self.__root, [msg.get_sender()], msg_content.get_val(),
-                                         msg_content.get_signed_val())
-            else:
-                path_from_root = msg_content.get_path_list()[1:] + [msg.get_sender()]
-                self.__apply_msg_content(self.get_root(), path_from_root, msg_content.get_val(),
-                                         msg_content.get_signed_val())
-
-    def __apply_msg_content(self, node: AuthNode, path: list[int], val: int, signed_val: bytes):
-        if len(path) == 0 or path is None:
-            node.set_val(val)
-            node.set_signed_val(signed_val)
-            node.set_is_authed(True)
+            signed_vals = [node.get_signed_val() for node in frontier]
+        return AuthFrontierMessage(vals, signed_vals, sender=self.get_proc_uid(), proc_count=self.get_proc_count(),
+                                   level=len(self.__levels) - 1)
+
+    def get_node(self, path: tuple[int, ...]) -> AuthNode | None:
+        if len(path) >= len(self.__levels):
+            return None
+        self.__write_decisions()
+        rank = rank_path(self.get_proc_count(), path)
+        return None if rank is None else self.__levels[len(path)][rank]
+
+    def apply_msg(self, msg: AuthMessage | AuthFrontierMessage):
+        if isinstance(msg, AuthFrontierMessage):
+            self.__apply_frontier_msg(msg)
+            return
+        sender = (msg.get_sender(),)
+        for msg_content in msg.get_content_view():
+            path = msg_content.get_path()[1:] + sender
+            slot = rank_path(self.get_proc_count(), path) if len(path) < len(self.__levels) else None
+            if slot is not None:
+                self.__set_node(len(path), slot, msg_content.get_val(), msg_content.get_signed_val())
+
+    def __apply_frontier_msg(self, msg: AuthFrontierMessage):
+        level = msg.get_level() + 1
+        if level >= len(self.__levels):
+            return
+        slots = get_append_slots(self.get_proc_count(), msg.get_level(), msg.get_sender())
+        signed_vals = msg.get_signed_vals()
+        for i in np.flatnonzero((slots >= 0) & msg.get_present()).tolist():
+            val = int(msg.get_vals()[i])
+            self.__set_node(level, int(slots[i]), None if val == NO_VAL else val, signed_vals[i])
+
+    def __set_node(self, level: int, slot: int, val: int | None, signed_val: bytes):
+        node = self.__levels[level][slot]
+        node.set_val(val)
+        node.set_signed_val(signed_val)
+        node.set_is_authed(True)
+        self.__vals[level][slot] = NO_VAL if val is None else val
+        self.__authed[level][slot] = True
+
+    def get_levels(self) -> list[list[AuthNode]]:
+        self.__write_decisions()
+        return self.__levels.copy()
+
+    def get_level_vals(self, level: int) -> np.ndarray:
+        return self.__vals[level].copy()
+
+    def get_level_decisions(self, level: int) -> np.ndarray:
+        # NOT_DECIDED (-1) for nodes decide never reached, UNAUTHED for the None decision
+        if self.__decisions is not None:
+            return self.__decisions[level].copy()
+        nodes = self.__levels[level]
+        return np.fromiter((UNAUTHED if node.get_decision() is None else node.get_decision() for node in nodes),
+                           dtype=np.int8, count=len(nodes))
+
+    def decide(self, vectorized: bool = False):
+        if vectorized:
+            self.__decide_vectorized()
         else:
-            next_id = path[0]
-            for child in node.get_children():
-                if child.get_proc_uid() == next_id:
-                    self.__apply_msg_content(child, path[1:], val, signed_val)
-                    break
-
-    def decide(self):
-        self.__decision = self.get_root().decide()
+            self.__decision = self.get_root().decide()
         return self.__decision
+
+    def __decide_vectorized(self):
+        # decided from the val and authed arrays, and decisions stay level arrays: the nodes only get theirs
+        # once a node is handed out (__write_decisions), so a run that only needs the decision, or the decision
+        # colors for a snapshot, never visits the nodes
+        self.__decisions = auth_decide_levels(self.__vals, self.__authed, self.get_proc_count())
+        decision = int(self.__decisions[0][0])
+        self.__decision = None if decision == UNAUTHED else decision
+
+    def __write_decisions(self):
+        if self.__decisions is None:
+            return
+        for nodes, level_decisions in zip(self.__levels, self.__decisions):
+            for node, decision in zip(nodes, level_decisions.tolist()):
+                node.set_decision(None if decision == UNAUTHED else decision)
+        self.__decisions = None
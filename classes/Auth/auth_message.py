@@ -1,29 +1,38 @@
+import numpy as np
+
+from classes.Auth.signature_chain import encode_chain, get_chain_size, get_encoded_chain_size
+from classes.eig_index import get_level_paths, NO_VAL
+from classes.message import CONTENT_HEADER, encode_int8, encode_path, FRONTIER_HEADER, read_only
+
+# Same immutability rules and wire format as classes/message.py: accessors return views, the list getters
+# are kept for compatibility and still return fresh lists.
+
+
 class AuthMessageContent:
-    def __init__(self, path_list: list[int], val: int, signed_val: bytes):
-        self.__path_list = path_list.copy()
+    __slots__ = ('__path', '__val', '__signed_val')
+
+    def __init__(self, path_list: list[int] | tuple[int, ...], val: int, signed_val: bytes):
+        self.__path = tuple(path_list)
         self.__val = val
         self.__signed_val = signed_val
 
+    def get_path(self) -> tuple[int, ...]:
+        return self.__path
+
     def get_path_list(self) -> list[int]:
-        return self.__path_list.copy()
+        return list(self.__path)
 
     def get_val(self) -> int:
         return self.__val
 
     def get_content(self) -> tuple[list[int], int]:
-        return self.__path_list.copy(), self.__val
+        return list(self.__path), self.__val
 
     def get_signed_val(self) -> bytes:
         return self.__signed_val
 
-    def set_signed_val(self, val: bytes):
-        self.__signed_val = val
-
-    def set_val(self, val: int):
-        self.__val = val
-
     def __str__(self):
-        path = ''.join(str(p) for p in self.__path_list)
+        path = ''.join(str(p) for p in self.__path)
         return f'path: {path}, val: {self.__val}, signed-val: {self.__signed_val}'
 
     def __repr__(self):
@@ -31,19 +40,141 @@ class AuthMessageContent:
 
 
 class AuthMessage:
-    def __init__(self, content_list: list[AuthMessageContent], sender: int):
-        self.__contents = content_list.copy()
+    __slots__ = ('__contents', '__sender', '__round_number')
+
+    def __init__(self, content_list: list[AuthMessageContent] | tuple[AuthMessageContent, ...], sender: int,
+                 round_number: int = None):
+        self.__contents = tuple(content_list)
         self.__sender = sender
+        self.__round_number = round_number  # round in which the message is sent, starting from 1
 
     def get_content(self) -> list[AuthMessageContent]:
-        return self.__contents.copy()
+        return list(self.__contents)
+
+    def get_content_view(self) -> tuple[AuthMessageContent, ...]:
+        return self.__contents
+
+    def get_content_count(self) -> int:
+        return len(self.__contents)
 
     def get_sender(self) -> int:
         return self.__sender
 
+    def get_round_number(self) -> int | None:
+        return self.__round_number
+
+    def get_signature_size(self) -> int:
+        return sum(get_chain_size(c.get_signed_val()) for c in self.__contents)
+
+    def serialize(self) -> bytes:
+        contents = b''.join(encode_path(c.get_path()) + encode_int8(c.get_val()) + encode_chain(c.get_signed_val())
+                            for c in self.__contents)
+        return CONTENT_HEADER.pack(self.__sender, self.__round_number or 0, len(self.__contents)) + contents
+
+    def get_serialized_size(self) -> int:
+        return CONTENT_HEADER.size + sum(2 + len(c.get_path()) - (-1 in c.get_path()) +
+                                         get_encoded_chain_size(c.get_signed_val()) for c in self.__contents)
+
+    def replace_contents(self, replaced: dict[int, AuthMessageContent]) -> 'AuthMessage':
+        # the returned message shares every content that is not replaced with this one
+        if len(replaced) == 0:
+            return self
+        contents = tuple(replaced.get(i, content) for i, content in enumerate(self.__contents))
+        return AuthMessage(contents, sender=self.__sender, round_number=self.__round_number)
+
     def __str__(self):
         contents_str = [str(content) for content in self.__contents]
-        return f'sender: {self.get_sender()}\n' + '\n'.join(contents_str)
+        return f'sender: {self.get_sender()}, round: {self.get_round_number()}\n' + '\n'.join(contents_str)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class AuthFrontierMessage:
+    # frontier-only form of AuthMessage: values and signed values of the sender's frontier in slot order, the
+    # paths are implied by the level. present marks the slots that are part of the message (filtering a
+    # message clears the slots with a wrong signature instead of rebuilding it)
+    __slots__ = ('__vals', '__signed_vals', '__sender', '__proc_count', '__level', '__present')
+
+    def __init__(self, vals: np.ndarray, signed_vals: list[bytes | None] | tuple[bytes | None, ...], sender: int,
+                 proc_count: int, level: int, present: np.ndarray = None):
+        self.__vals = read_only(np.asarray(vals, dtype=np.int8))
+        self.__signed_vals = tuple(signed_vals)
+        self.__sender = sender
+        self.__proc_count = proc_count
+        self.__level = level
+        if present is None:
+            present = np.ones(len(self.__vals), dtype=bool)
+        self.__present = read_only(np.asarray(present, dtype=bool))
+
+    def get_vals(self) -> np.ndarray:
+        return self.__vals
+
+    def get_signed_vals(self) -> tuple[bytes | None, ...]:
+        return self.__signed_vals
+
+    def get_present(self) -> np.ndarray:
+        return self.__present
+
+    def get_sender(self) -> int:
+        return self.__sender
+
+    def get_proc_count(self) -> int:
+        return self.__proc_count
+
+    def get_level(self) -> int:
+        return self.__level
+
+    def get_round_number(self) -> int:
+        return self.__level + 1
+
+    def get_content_count(self) -> int:
+        return int(self.__present.sum())
+
+    def get_payload_size(self) -> int:
+        # bytes of the present values (one each) and of their signature chains
+        return self.get_content_count() + self.get_signature_size()
+
+    def get_signature_size(self) -> int:
+        return sum(get_chain_size(signed_val) for signed_val in self.__get_present_signed_vals())
+
+    def __get_present_signed_vals(self) -> list:
+        return [signed_val for signed_val, present in zip(self.__signed_vals, self.__present.tolist()) if present]
+
+    def serialize(self) -> bytes:
+        header = FRONTIER_HEADER.pack(self.__sender, self.__proc_count, self.__level, len(self.__vals))
+        chains = b''.join(encode_chain(signed_val) for signed_val in self.__get_present_signed_vals())
+        return header + np.packbits(self.__present).tobytes() + self.__vals[self.__present].tobytes() + chains
+
+    def get_serialized_size(self) -> int:
+        return FRONTIER_HEADER.size + (len(self.__vals) + 7) // 8 + self.get_content_count() + \
+            sum(get_encoded_chain_size(signed_val) for signed_val in self.__get_present_signed_vals())
+
+    def get_content(self) -> list[AuthMessageContent]:
+        paths = get_level_paths(self.__proc_count, self.__level).tolist()
+        return [AuthMessageContent([-1] + path if len(path) > 0 else [], None if val == NO_VAL else val, signed_val)
+                for path, val, signed_val, present in
+                zip(paths, self.__vals.tolist(), self.__signed_vals, self.__present.tolist()) if present]
+
+    def replace_vals(self, replaced: dict[int, tuple[int, bytes]]) -> 'AuthFrontierMessage':
+        # replaced maps a slot to its new (val, signed val)
+        if len(replaced) == 0:
+            return self
+        vals = self.__vals.copy()
+        signed_vals = list(self.__signed_vals)
+        for i, (val, signed_val) in replaced.items():
+            vals[i] = NO_VAL if val is None else val
+            signed_vals[i] = signed_val
+        return AuthFrontierMessage(vals, signed_vals, sender=self.__sender, proc_count=self.__proc_count,
+                                   level=self.__level, present=self.__present)
+
+    def with_present(self, present: np.ndarray) -> 'AuthFrontierMessage':
+        return AuthFrontierMessage(self.__vals, self.__signed_vals, sender=self.__sender,
+                                   proc_count=self.__proc_count, level=self.__level, present=present)
+
+    def __str__(self):
+        contents_str = [str(content) for content in self.get_content()]
+        return f'sender: {self.get_sender()}, round: {self.get_round_number()}\n' + '\n'.join(contents_str)
 
     def __repr__(self):
         return self.__str__()
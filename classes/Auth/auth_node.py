@@ -76,8 +76,8 @@ class AuthNode:
             else:
                 self.set_decision(self.get_val())
         else:
-            child_decision = [child.decide() for child in self.get_children() if
-                              child.is_authed() and child.decide() is not None]
+            authed_children = [child.decide() for child in self.get_children() if child.is_authed()]
+            child_decision = [decision for decision in authed_children if decision is not None]
             summation = sum(child_decision)
             half_child_count = len(child_decision) // 2
             decision = 1 if summation > half_child_count else 0
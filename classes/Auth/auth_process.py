@@ -1,25 +1,49 @@
-import random
-from cryptidy import asymmetric_encryption
+import numpy as np
+import math
+from typing import TextIO
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from classes.Auth.auth_eig_tree import AuthEIGByzTree
-from classes.Auth.auth_message import AuthMessage
+from classes.Auth.auth_message import AuthFrontierMessage, AuthMessage
+from classes.Auth.key_store import KeyStore
+from classes.Auth.signature_chain import check_chain_format, extend_chain, NESTED_CHAIN
+from classes.Auth.signer import CryptidySigner, Signer
+from classes.Auth.verification_cache import ChainVerificationError, VerificationCache
+from classes.Auth.verification_log import VerificationFailure, VerificationLog
+from classes.eig_index import get_level_paths, NO_VAL
 from classes.message import Message
+from classes.sim_random import draw_lie_mask
+from classes.tree_snapshot import take_snapshot, TreeSnapshot
 
 
 class AuthProcess:
-    def __init__(self, proc_uid: int, proc_count: int, proc_val: int, is_byz: bool = False, lie_prob: int = 50):
+    def __init__(self, proc_uid: int, proc_count: int, proc_val: int, is_byz: bool = False, lie_prob: int = 50,
+                 signer: Signer = None, key_store: KeyStore = None, verification_cache: VerificationCache = None,
+                 chain_format: str = NESTED_CHAIN, verification_log: VerificationLog = None, verify_threads: int = 1,
+                 rng: np.random.Generator = None):
         self.__proc_uid = proc_uid
         self.__proc_count = proc_count
         self.__proc_val = proc_val
         self.__byz = is_byz
         self.__tree = AuthEIGByzTree(self.__proc_uid, self.__proc_count, self.__proc_val)
-        self.__received_messages = []
+        self.__received_messages = {}  # round number -> messages received for that round
         self.__decision = None
         self.__lie_prob = lie_prob
+        self.__rng = np.random.default_rng() if rng is None else rng  # stream the lies are drawn from
+        self.__sign_count = 0
         self.__public_keys = None
-        self.__pub_key, self.__pri_key = asymmetric_encryption.generate_keys(2048)  # 2048 bits RSA key
-        # here we change public key and private key in order to make simply convert rsa encryption
-        # to digital signature
+        self.__signer = CryptidySigner() if signer is None else signer  # default is 2048 bits RSA key
+        # pub key is the key others verify this process signatures with, pri key is the one it signs with
+        if key_store is None:
+            self.__pub_key, self.__pri_key = self.__signer.generate_keys()
+        else:
+            self.__pub_key, self.__pri_key = key_store.get_keys(self.__signer, proc_uid)
+        self.__verification_cache = VerificationCache() if verification_cache is None else verification_cache
+        self.__verification_log = VerificationLog() if verification_log is None else verification_log
+        self.__verify_threads = verify_threads
+        check_chain_format(chain_format)
+        self.__chain_format = chain_format
 
     def set_public_keys(self, keys: list[str]):
         if len(keys) != self.get_proc_count():
@@ -35,6 +59,24 @@ class AuthProcess:
     def get_pub_key(self) -> str:
         return self.__pub_key
 
+    def get_signer(self) -> Signer:
+        return self.__signer
+
+    def get_chain_format(self) -> str:
+        return self.__chain_format
+
+    def get_verification_cache(self) -> VerificationCache:
+        return self.__verification_cache
+
+    def set_verification_cache(self, verification_cache: VerificationCache):
+        self.__verification_cache = verification_cache
+
+    def get_verification_log(self) -> VerificationLog:
+        return self.__verification_log
+
+    def set_verification_log(self, verification_log: VerificationLog):
+        self.__verification_log = verification_log
+
     def get_proc_uid(self) -> int:
         return self.__proc_uid
 
@@ -57,67 +99,141 @@ class AuthProcess:
         return self.__byz
 
     def receive_msg(self, msg: Message):
-        self.__received_messages.append(msg)
+        self.__received_messages.setdefault(msg.get_round_number(), []).append(msg)
 
     def receive_msgs(self, msgs: list[Message]):
         for msg in msgs:
             self.receive_msg(msg)
 
-    def apply_msgs(self):
-        for msg in self.__received_messages:
-            filtered_msg = self.__filter_msgs_by_correct_signature(msg)
-            self.get_tree().apply_msg(filtered_msg)
-
-    def __filter_msgs_by_correct_signature(self, msg: AuthMessage) -> AuthMessage:
-        msg_contents_to_remove = []
-        for msg_content in msg.get_content():
-            if msg_content.get_val() is None:
-                msg_contents_to_remove.append(msg_content)
-                continue
-            original_val = msg_content.get_signed_val()
-            path = msg_content.get_path_list()
-            path.append(msg.get_sender())
-            if -1 in path:
-                path.remove(-1)
-            path.reverse()
-            has_exception = False
-            for p in path:
-                try:
-                    key = self.get_public_keys()[p - 1]
-                    _, original_val = asymmetric_encryption.decrypt_message(original_val, key)
-                except Exception as e:
-                    has_exception = True
-                    print(
-                        f'proc: {self.get_proc_uid()} failed to receive from proc: {msg.get_sender()} for path: {msg_content.get_path_list()} for p: {p}, content: {msg_content.get_signed_val()[:4] if msg_content.get_signed_val() is not None else str()}, exception: {e}')
-                    msg_contents_to_remove.append(msg_content)
-                    break
-            if has_exception or original_val != msg_content.get_val():
-                msg_contents_to_remove.append(msg_content)
-        final_msg_contents = [mc for mc in msg.get_content() if mc not in msg_contents_to_remove]
-        return AuthMessage(final_msg_contents, sender=msg.get_sender())
-
-    def generate_msg(self):
+    def get_pending_rounds(self) -> list[int]:
+        return sorted(self.__received_messages, key=lambda r: -1 if r is None else r)
+
+    def apply_msgs(self, round_number: int = None):
+        # applies the messages of one round (of every pending round if round_number is None) and releases them
+        rounds = self.get_pending_rounds() if round_number is None else [round_number]
+        for r in rounds:
+            for filtered_msg in self.__filter_msgs_by_correct_signature(self.__received_messages.pop(r, []), r):
+                self.get_tree().apply_msg(filtered_msg)
+
+    def __filter_msgs_by_correct_signature(self, msgs: list[AuthMessage | AuthFrontierMessage],
+                                           round_number: int = None) -> list[AuthMessage | AuthFrontierMessage]:
+        # the signatures of all contents of the round are checked in one batch, then every message is
+        # filtered down to the contents whose signature is correct
+        checks = []  # (message index, content index, path, val, signed val, sender)
+        for msg_index, msg in enumerate(msgs):
+            if isinstance(msg, AuthFrontierMessage):
+                paths = get_level_paths(self.get_proc_count(), msg.get_level()).tolist()
+                vals = msg.get_vals().tolist()
+                signed_vals = msg.get_signed_vals()
+                for i in np.flatnonzero(msg.get_present()).tolist():
+                    if vals[i] != NO_VAL:
+                        checks.append((msg_index, i, paths[i], vals[i], signed_vals[i], msg.get_sender()))
+            else:
+                for i, msg_content in enumerate(msg.get_content_view()):
+                    if msg_content.get_val() is not None:
+                        path = [p for p in msg_content.get_path() if p != -1]
+                        checks.append((msg_index, i, path, msg_content.get_val(), msg_content.get_signed_val(),
+                                       msg.get_sender()))
+        correct = [set() for _ in msgs]
+        for (msg_index, i, path, _, _, sender), failure in zip(checks, self.__verify_batch(checks)):
+            if failure is None:
+                correct[msg_index].add(i)
+            else:
+                self.__verification_log.record_failure(
+                    VerificationFailure(self.get_proc_uid(), sender, round_number, tuple(path), *failure))
+        filtered_msgs = []
+        for msg, correct_indexes in zip(msgs, correct):
+            if isinstance(msg, AuthFrontierMessage):
+                present = np.zeros(len(msg.get_vals()), dtype=bool)
+                present[list(correct_indexes)] = True
+                filtered_msgs.append(msg.with_present(present))
+            else:
+                final_msg_contents = [msg_content for i, msg_content in enumerate(msg.get_content_view())
+                                      if i in correct_indexes]
+                filtered_msgs.append(AuthMessage(final_msg_contents, sender=msg.get_sender(),
+                                                 round_number=msg.get_round_number()))
+        return filtered_msgs
+
+    def __verify_batch(self, checks: list[tuple]) -> list[tuple[int | None, str] | None]:
+        # the backends do their work outside the GIL (pycryptodome in C, hashlib for large inputs), so the
+        # checks of a batch run on a thread pool when verify_threads > 1
+        threads = max(1, min(self.__verify_threads, len(checks)))
+        start = time.perf_counter()
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                failures = list(executor.map(self.__check_signature, checks,
+                                             chunksize=math.ceil(len(checks) / (threads * 4))))
+        else:
+            failures = [self.__check_signature(check) for check in checks]
+        self.__verification_log.record_batch(len(checks), time.perf_counter() - start, threads)
+        return failures
+
+    def __check_signature(self, check: tuple) -> tuple[int | None, str] | None:
+        # returns None for a correct signature, else (uid of the wrong signer or None, reason)
+        _, _, path, val, signed_val, sender = check
+        # path is the sender's slot path without the -1 root marker. every process on path + [sender] signed
+        # the value once, so the signatures are peeled from the last signer to the first (each verified
+        # prefix of the chain is kept in the verification cache)
+        signers = tuple(path) + (sender,)
+        try:
+            if self.__chain_format == NESTED_CHAIN:
+                original_val = self.__verification_cache.verify_chain(self.__signer, self.__public_keys, signers,
+                                                                      signed_val)
+            else:
+                self.__verification_cache.verify_flat_chain(self.__signer, self.__public_keys, signers, val,
+                                                            signed_val)
+                original_val = val
+        except ChainVerificationError as e:
+            return e.signer_uid, f'{type(e.cause).__name__}: {e.cause}'
+        if original_val != val:
+            return None, f'value mismatch: signed {original_val}, received {val}'
+        return None
+
+    def get_sign_count(self) -> int:
+        return self.__sign_count
+
+    def __sign(self, val, prev_chain, path: list[int]):
+        self.__sign_count += 1
+        return extend_chain(self.__signer, self.__chain_format, self.__pri_key, val, prev_chain,
+                            tuple(path) + (self.get_proc_uid(),))
+
+    def generate_round_msg(self) -> AuthFrontierMessage:
         msg = self.get_tree().get_message()
-        random.seed()
-        if self.is_byz():
-            for msg_content in msg.get_content():
-                if random.randint(1, 100) <= self.get_lie_prob():
-                    val = msg_content.get_val()
-                    val = random.randint(0, 1) if val is None else 1 - val
-                    msg_content.set_val(val)  # 1 - val change zero to one and one to zero
-        for msg_content in msg.get_content():
+        paths = get_level_paths(self.get_proc_count(), msg.get_level()).tolist()
+        signed_vals = [self.__sign(None if val == NO_VAL else val, prev_chain, path)
+                       for val, prev_chain, path in zip(msg.get_vals().tolist(), msg.get_signed_vals(), paths)]
+        return AuthFrontierMessage(msg.get_vals(), signed_vals, sender=msg.get_sender(),
+                                   proc_count=msg.get_proc_count(), level=msg.get_level())
+
+    def generate_msg(self, round_msg: AuthFrontierMessage = None) -> AuthFrontierMessage:
+        # round_msg is signed once and shared by every recipient of this round, so lies are added as an
+        # overlay on a copy. above the root, the signature covers the previous signed value and not the
+        # value itself, so a lie keeps the original signature; at the root the lie itself is signed
+        if round_msg is None:
+            round_msg = self.generate_round_msg()
+        if not self.is_byz():
+            return round_msg
+        vals = round_msg.get_vals()
+        lie_slots = np.flatnonzero(draw_lie_mask(self.__rng, len(vals), self.get_lie_prob()))
+        lie_vals = 1 - vals[lie_slots]  # 1 - val change zero to one and one to zero
+        unknown = vals[lie_slots] == NO_VAL
+        lie_vals[unknown] = self.__rng.integers(0, 2, size=int(unknown.sum()))
+        lies = {}
+        for i, val in zip(lie_slots.tolist(), lie_vals.tolist()):
             if self.get_tree().get_root().is_leaf():
-                value_to_sign = msg_content.get_val()
+                signed_val = self.__sign(val, None, [])
             else:
-                value_to_sign = msg_content.get_signed_val()
-            signed = asymmetric_encryption.encrypt_message(value_to_sign, self.__pri_key)
-            msg_content.set_signed_val(signed)
-        return msg
+                signed_val = round_msg.get_signed_vals()[i]
+            lies[i] = (val, signed_val)
+        return round_msg.replace_vals(lies)
 
     def plot_tree(self, fig_size: tuple[int, int] = (75, 10), path: str = None, node_size: int = 1200,
                   show_step_plots: bool = True):
         self.__tree.plot_tree(fig_size=fig_size, path=path, node_size=node_size, show_step_plots=show_step_plots)
 
+    def get_tree_snapshot(self) -> TreeSnapshot:
+        return take_snapshot(self.get_tree())
+
     def add_tree_level(self):
         tree_height = self.get_tree().get_tree_height()
         if tree_height != self.get_proc_count():
@@ -125,9 +241,12 @@ class AuthProcess:
         else:
             raise Exception(f'tree-has been completed with height: {tree_height}')
 
-    def log_tree(self):
-        return self.get_tree().log()
+    def get_node_count(self) -> int:
+        return self.get_tree().get_node_count()
+
+    def log_tree(self, file: TextIO = None) -> str | None:
+        return self.get_tree().log(file)
 
-    def decide(self) -> int:
-        self.__decision = self.get_tree().decide()
+    def decide(self, vectorized: bool = False) -> int:
+        self.__decision = self.get_tree().decide(vectorized=vectorized)
         return self.__decision
@@ -0,0 +1,33 @@
+import json
+import os
+import tempfile
+
+from classes.Auth.signer import Signer
+
+
+# keeps the key pair of every process on disk, one json file per signer and process uid, so repeated runs
+# reuse keys instead of generating them again (2048 bits RSA keys take seconds per process)
+class KeyStore:
+    def __init__(self, directory: str = '.keys'):
+        self.__directory = directory
+
+    def get_directory(self) -> str:
+        return self.__directory
+
+    def __get_key_path(self, signer: Signer, proc_uid: int) -> str:
+        return os.path.join(self.__directory, signer.get_name(), f'proc-{proc_uid}.json')
+
+    def get_keys(self, signer: Signer, proc_uid: int) -> tuple[str, str]:
+        path = self.__get_key_path(signer, proc_uid)
+        if os.path.exists(path):
+            with open(path) as f:
+                keys = json.load(f)
+            return keys['verify_key'], keys['sign_key']
+        verify_key, sign_key = signer.generate_keys()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # every writer gets its own temporary file, so workers that create the same key at once do not write
+        # into each other's file, and a run that is interrupted while saving never leaves a broken key file
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+            json.dump({'verify_key': verify_key, 'sign_key': sign_key}, f)
+        os.replace(f.name, path)
+        return verify_key, sign_key
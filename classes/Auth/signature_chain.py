@@ -0,0 +1,58 @@
+import struct
+
+from classes.Auth.signer import Signer, encode_val
+
+# A signature chain proves which processes relayed a value. Two formats are supported:
+#   nested: every hop signs the signed value of the previous hop, so the value is recovered by peeling the
+#           signatures from the last signer to the first and the blob grows with every layer of the backend
+#   flat:   a tuple with one detached signature per hop, hop j signs (value, first j + 1 signer uids). the
+#           hops are verified independently and the chain grows by one signature per hop
+NESTED_CHAIN = 'nested'
+FLAT_CHAIN = 'flat'
+CHAIN_FORMATS = (NESTED_CHAIN, FLAT_CHAIN)
+
+
+def check_chain_format(chain_format: str):
+    if chain_format not in CHAIN_FORMATS:
+        raise ValueError(f'unknown signature chain format {chain_format}, expected one of {CHAIN_FORMATS}')
+
+
+def get_hop_payload(val, signers: tuple[int, ...]) -> bytes:
+    # what hop len(signers) signs in a flat chain. uids are at most 63 (see ArrayEIGByzTree), one byte each
+    return encode_val(val) + b'|' + bytes(signers)
+
+
+def extend_chain(signer: Signer, chain_format: str, sign_key: str, val, prev_chain, signers: tuple[int, ...]):
+    # signers ends with the uid of the process that signs now, prev_chain is ignored for the first hop
+    first_hop = len(signers) == 1
+    if chain_format == NESTED_CHAIN:
+        return signer.sign(val if first_hop else prev_chain, sign_key)
+    hop = signer.sign_detached(get_hop_payload(val, signers), sign_key)
+    return (hop,) if first_hop or prev_chain is None else tuple(prev_chain) + (hop,)
+
+
+def get_chain_size(chain) -> int:
+    # bytes of signature data carried by a chain of either format
+    if chain is None:
+        return 0
+    if isinstance(chain, bytes):
+        return len(chain)
+    return sum(len(hop) for hop in chain)
+
+
+def encode_chain(chain) -> bytes:
+    # wire form of a chain: a tag byte (0 none, 1 nested, 2 flat), then a nested blob as u32 length and
+    # bytes, or a flat chain as u8 hop count and every hop as u16 length and bytes
+    if chain is None:
+        return b'\x00'
+    if isinstance(chain, bytes):
+        return b'\x01' + struct.pack('>I', len(chain)) + chain
+    return b'\x02' + bytes([len(chain)]) + b''.join(struct.pack('>H', len(hop)) + hop for hop in chain)
+
+
+def get_encoded_chain_size(chain) -> int:
+    if chain is None:
+        return 1
+    if isinstance(chain, bytes):
+        return 5 + len(chain)
+    return 2 + sum(2 + len(hop) for hop in chain)
@@ -0,0 +1,165 @@
+import hashlib
+import hmac
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from cryptidy import asymmetric_encryption
+
+# A signer turns a value into a signed blob that carries the value, and recovers the value from a blob when
+# the blob was signed with the matching key. Values are what AuthProcess signs: 0/1, None or the signed blob
+# of the previous hop, so chains are built by signing blobs again.
+#
+# generate_keys returns (verify_key, sign_key). verify keys are shared with every process as strings.
+# sign_detached/verify_detached sign a payload without carrying it, they are used by flat signature chains
+# (classes/Auth/signature_chain.py). a backend that can only sign with message recovery returns the whole
+# signed blob as the detached signature.
+
+
+class Signer(ABC):
+    @abstractmethod
+    def get_name(self) -> str:
+        ...
+
+    @abstractmethod
+    def generate_keys(self) -> tuple[str, str]:
+        ...
+
+    @abstractmethod
+    def sign(self, val, sign_key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def verify(self, signed_val: bytes, verify_key: str):
+        # returns the signed value, raises an exception if signed_val was not signed with the matching key
+        ...
+
+    def sign_detached(self, payload: bytes, sign_key: str) -> bytes:
+        return self.sign(payload, sign_key)
+
+    def verify_detached(self, payload: bytes, signature: bytes, verify_key: str):
+        # raises an exception if signature is not a signature of payload with the matching key
+        if self.verify(signature, verify_key) != payload:
+            raise ValueError('signature was made for another payload')
+
+
+class CryptidySigner(Signer):
+    # the original scheme: RSA encryption of cryptidy with public and private key swapped, so "encrypting"
+    # with the private key is signing and only the matching public key can recover the value
+    def __init__(self, key_size: int = 2048):
+        self.__key_size = key_size
+
+    def get_name(self) -> str:
+        return f'cryptidy-{self.__key_size}'
+
+    def generate_keys(self) -> tuple[str, str]:
+        return asymmetric_encryption.generate_keys(self.__key_size)
+
+    def sign(self, val, sign_key: str) -> bytes:
+        return asymmetric_encryption.encrypt_message(val, sign_key)
+
+    def verify(self, signed_val: bytes, verify_key: str):
+        _, val = asymmetric_encryption.decrypt_message(signed_val, verify_key)
+        return val
+
+
+def encode_val(val) -> bytes:
+    if val is None:
+        return b'n'
+    if isinstance(val, bytes):
+        return b'b' + val
+    return b'i' + str(int(val)).encode()
+
+
+def decode_val(data: bytes):
+    match data[:1]:
+        case b'n':
+            return None
+        case b'b':
+            return data[1:]
+        case b'i':
+            return int(data[1:])
+    raise ValueError(f'unknown signed value encoding {data[:1]}')
+
+
+class Ed25519Signer(Signer):
+    # blob = encoded value + 64 bytes Ed25519 signature, uses pycryptodomex which comes with cryptidy
+    SIGNATURE_SIZE = 64
+
+    def get_name(self) -> str:
+        return 'ed25519'
+
+    def generate_keys(self) -> tuple[str, str]:
+        from Cryptodome.PublicKey import ECC
+        key = ECC.generate(curve='ed25519')
+        return key.public_key().export_key(format='PEM'), key.export_key(format='PEM')
+
+    def sign(self, val, sign_key: str) -> bytes:
+        from Cryptodome.Signature import eddsa
+        payload = encode_val(val)
+        return payload + eddsa.new(load_ecc_key(sign_key), 'rfc8032').sign(payload)
+
+    def verify(self, signed_val: bytes, verify_key: str):
+        from Cryptodome.Signature import eddsa
+        if not isinstance(signed_val, bytes) or len(signed_val) <= self.SIGNATURE_SIZE:
+            raise ValueError('signed value is too short to carry an Ed25519 signature')
+        payload, signature = signed_val[:-self.SIGNATURE_SIZE], signed_val[-self.SIGNATURE_SIZE:]
+        eddsa.new(load_ecc_key(verify_key), 'rfc8032').verify(payload, signature)
+        return decode_val(payload)
+
+    def sign_detached(self, payload: bytes, sign_key: str) -> bytes:
+        from Cryptodome.Signature import eddsa
+        return eddsa.new(load_ecc_key(sign_key), 'rfc8032').sign(payload)
+
+    def verify_detached(self, payload: bytes, signature: bytes, verify_key: str):
+        from Cryptodome.Signature import eddsa
+        eddsa.new(load_ecc_key(verify_key), 'rfc8032').verify(payload, signature)
+
+
+@lru_cache(maxsize=1024)
+def load_ecc_key(key: str):
+    from Cryptodome.PublicKey import ECC
+    return ECC.import_key(key)
+
+
+class HmacSigner(Signer):
+    # keyed-hash stand-in for large experiments: blob = encoded value + HMAC-SHA256 tag. the verify key is
+    # the secret itself, so it only models signatures inside a simulation where processes do not forge
+    TAG_SIZE = 32
+
+    def get_name(self) -> str:
+        return 'hmac-sha256'
+
+    def generate_keys(self) -> tuple[str, str]:
+        key = os.urandom(32).hex()
+        return key, key
+
+    def sign(self, val, sign_key: str) -> bytes:
+        payload = encode_val(val)
+        return payload + hmac.new(bytes.fromhex(sign_key), payload, hashlib.sha256).digest()
+
+    def verify(self, signed_val: bytes, verify_key: str):
+        if not isinstance(signed_val, bytes) or len(signed_val) <= self.TAG_SIZE:
+            raise ValueError('signed value is too short to carry an HMAC tag')
+        payload, tag = signed_val[:-self.TAG_SIZE], signed_val[-self.TAG_SIZE:]
+        expected = hmac.new(bytes.fromhex(verify_key), payload, hashlib.sha256).digest()
+        if not hmac.compare_digest(tag, expected):
+            raise ValueError('wrong HMAC tag')
+        return decode_val(payload)
+
+    def sign_detached(self, payload: bytes, sign_key: str) -> bytes:
+        return hmac.new(bytes.fromhex(sign_key), payload, hashlib.sha256).digest()
+
+    def verify_detached(self, payload: bytes, signature: bytes, verify_key: str):
+        expected = hmac.new(bytes.fromhex(verify_key), payload, hashlib.sha256).digest()
+        if not hmac.compare_digest(signature, expected):
+            raise ValueError('wrong HMAC tag')
+
+
+SIGNERS = {'cryptidy': CryptidySigner, 'ed25519': Ed25519Signer, 'hmac': HmacSigner}
+
+
+def get_signer(name: str) -> Signer:
+    if name not in SIGNERS:
+        raise ValueError(f'unknown signer {name}, expected one of {list(SIGNERS)}')
+    return SIGNERS[name]()
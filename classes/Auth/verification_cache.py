@@ -0,0 +1,164 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from classes.Auth.signature_chain import get_hop_payload
+from classes.Auth.signer import Signer
+
+
+# Signature chains are verified layer by layer from the last signer to the first. Every layer that is
+# peeled is itself the signed value of a shorter chain, so the cache keeps the result of each chain prefix
+# under (signers of the prefix, digest of its signed value) and a chain that extends an already verified
+# prefix only costs the new layers. The result does not depend on the verifying process, so one cache is
+# shared by all processes of a simulation. Failures are cached too, with the signer that failed.
+# Flat chains have independent hops, there the cache keeps the result of every hop under (signers up to the
+# hop, digest of the hop payload and signature). Lookups and inserts are locked, so chains can be verified
+# from several threads; two threads may still verify the same missing prefix at the same time.
+
+
+class ChainVerificationError(Exception):
+    def __init__(self, signer_uid: int, cause: Exception):
+        super().__init__(str(cause))
+        self.signer_uid = signer_uid
+        self.cause = cause
+
+
+class _Failure:
+    __slots__ = ('signer_uid', 'cause')
+
+    def __init__(self, signer_uid: int, cause: Exception):
+        self.signer_uid = signer_uid
+        self.cause = cause
+
+
+_MISSING = object()  # verified values can be None, so a lookup miss needs its own marker
+
+
+def get_digest(signed_val: bytes) -> bytes:
+    return hashlib.blake2b(signed_val, digest_size=16).digest()
+
+
+class VerificationCache:
+    def __init__(self, maxsize: int = 65536):
+        self.__maxsize = maxsize
+        self.__entries = OrderedDict()  # (signers, digest) -> verified value or _Failure, least recent first
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = threading.Lock()
+
+    def __getstate__(self):
+        # locks can not be pickled, a copy sent to a worker process gets its own one
+        state = self.__dict__.copy()
+        del state['_VerificationCache__lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    def get_maxsize(self) -> int:
+        return self.__maxsize
+
+    def get_size(self) -> int:
+        return len(self.__entries)
+
+    def get_hits(self) -> int:
+        return self.__hits
+
+    def get_misses(self) -> int:
+        return self.__misses
+
+    def get_hit_rate(self) -> float:
+        lookups = self.__hits + self.__misses
+        return self.__hits / lookups if lookups > 0 else 0.0
+
+    def get_stats(self) -> dict:
+        return {'hits': self.__hits, 'misses': self.__misses, 'hit_rate': self.get_hit_rate(),
+                'size': self.get_size(), 'maxsize': self.__maxsize}
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__hits = 0
+            self.__misses = 0
+
+    def __get(self, key):
+        with self.__lock:
+            res = self.__entries.get(key, _MISSING)
+            if res is _MISSING:
+                self.__misses += 1
+            else:
+                self.__hits += 1
+                self.__entries.move_to_end(key)
+            return res
+
+    def __put(self, key, res):
+        with self.__lock:
+            self.__entries[key] = res
+            self.__entries.move_to_end(key)
+            if len(self.__entries) > self.__maxsize:
+                self.__entries.popitem(last=False)
+
+    def verify_chain(self, signer: Signer, public_keys: list[str], signers: tuple[int, ...], signed_val: bytes):
+        # signers are the uids that signed in order, the last one signed last. returns the value signed by
+        # the first signer, raises ChainVerificationError with the uid whose signature is wrong
+        if not isinstance(signed_val, bytes):
+            raise ChainVerificationError(signers[-1], TypeError(f'signed value {signed_val} is not bytes'))
+        peeled = []  # keys of the prefixes verified by this call, longest first
+        res = _MISSING
+        blob = signed_val
+        for length in range(len(signers), 0, -1):
+            key = (signers[:length], get_digest(blob))
+            res = self.__get(key)
+            if res is not _MISSING:
+                break
+            peeled.append(key)
+            p = signers[length - 1]
+            try:
+                blob = signer.verify(blob, public_keys[p - 1])
+            except Exception as e:
+                res = _Failure(p, e)
+                break
+            if length > 1 and not isinstance(blob, bytes):
+                res = _Failure(signers[length - 2], TypeError(f'signed value {blob} is not bytes'))
+                break
+        if res is _MISSING:
+            res = blob  # every layer was peeled
+        for key in peeled:
+            self.__put(key, res)
+        if isinstance(res, _Failure):
+            raise ChainVerificationError(res.signer_uid, res.cause)
+        return res
+
+    def verify_flat_chain(self, signer: Signer, public_keys: list[str], signers: tuple[int, ...], val,
+                          chain: tuple[bytes, ...]):
+        # raises ChainVerificationError with the uid of the first hop whose signature of val is wrong
+        if not isinstance(chain, tuple) or len(chain) != len(signers) or \
+                not all(isinstance(hop, bytes) for hop in chain):
+            raise ChainVerificationError(signers[-1], ValueError(f'chain does not have {len(signers)} hops'))
+        for length in range(1, len(signers) + 1):
+            payload = get_hop_payload(val, signers[:length])
+            hop = chain[length - 1]
+            key = (signers[:length], get_digest(payload + hop))
+            res = self.__get(key)
+            if res is _MISSING:
+                p = signers[length - 1]
+                try:
+                    signer.verify_detached(payload, hop, public_keys[p - 1])
+                    res = True
+                except Exception as e:
+                    res = _Failure(p, e)
+                self.__put(key, res)
+            if isinstance(res, _Failure):
+                raise ChainVerificationError(res.signer_uid, res.cause)
+
+    def merge(self, other: 'VerificationCache', since: tuple[int, int] = (0, 0)):
+        # adds entries and lookups of a copy of this cache that was used elsewhere (e.g. in a worker of a
+        # process pool). since is (hits, misses) of this cache when the copy was made
+        if other is self:
+            return
+        for key, res in other.__entries.items():
+            if key not in self.__entries:
+                self.__put(key, res)
+        self.__hits += other.__hits - since[0]
+        self.__misses += other.__misses - since[1]
@@ -0,0 +1,95 @@
+import logging
+from collections import Counter
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+# Keeps what the signature checks of a simulation did: how many contents were checked in how much time and
+# with how many threads, and one record per content that was rejected. Like the verification cache, one log
+# is shared by all processes of a simulation.
+
+
+class VerificationFailure(NamedTuple):
+    receiver: int
+    sender: int
+    round_number: int | None
+    path: tuple[int, ...]  # sender's slot path without the -1 root marker
+    signer_uid: int | None  # process whose signature is wrong, None if the chain verified to another value
+    reason: str
+
+
+class VerificationLog:
+    def __init__(self, keep_failures: int = 10000):
+        self.__keep_failures = keep_failures  # failures beyond this many are only counted
+        self.__failures = []
+        self.__failure_count = 0
+        self.__failures_by_sender = Counter()
+        self.__failures_by_reason = Counter()
+        self.__verified = 0
+        self.__seconds = 0.0
+        self.__thread_seconds = 0.0  # seconds times threads, to report throughput per core
+
+    def record_failure(self, failure: VerificationFailure):
+        self.__failure_count += 1
+        self.__failures_by_sender[failure.sender] += 1
+        self.__failures_by_reason[failure.reason.split(':')[0]] += 1
+        if len(self.__failures) < self.__keep_failures:
+            self.__failures.append(failure)
+        logger.debug('proc: %s failed to receive from proc: %s for path: %s for p: %s, reason: %s',
+                     failure.receiver, failure.sender, [-1] + list(failure.path), failure.signer_uid,
+                     failure.reason)
+
+    def record_batch(self, count: int, seconds: float, threads: int):
+        self.__verified += count
+        self.__seconds += seconds
+        self.__thread_seconds += seconds * threads
+
+    def get_failures(self) -> list[VerificationFailure]:
+        return self.__failures.copy()
+
+    def get_failure_count(self) -> int:
+        return self.__failure_count
+
+    def get_failures_by_sender(self) -> dict[int, int]:
+        return dict(self.__failures_by_sender)
+
+    def get_failures_by_reason(self) -> dict[str, int]:
+        return dict(self.__failures_by_reason)
+
+    def get_verified_count(self) -> int:
+        return self.__verified
+
+    def get_throughput(self) -> float:
+        # checked contents per second of wall time
+        return self.__verified / self.__seconds if self.__seconds > 0 else 0.0
+
+    def get_throughput_per_core(self) -> float:
+        return self.__verified / self.__thread_seconds if self.__thread_seconds > 0 else 0.0
+
+    def get_stats(self) -> dict:
+        return {'verified': self.__verified, 'failed': self.__failure_count, 'seconds': self.__seconds,
+                'throughput': self.get_throughput(), 'throughput_per_core': self.get_throughput_per_core(),
+                'failures_by_sender': self.get_failures_by_sender(),
+                'failures_by_reason': self.get_failures_by_reason()}
+
+    def get_snapshot(self) -> tuple:
+        return (self.__failure_count, self.__verified, self.__seconds, self.__thread_seconds,
+                self.__failures_by_sender.copy(), self.__failures_by_reason.copy())
+
+    def merge(self, other: 'VerificationLog', since: tuple = None):
+        # adds what a copy of this log recorded elsewhere (e.g. in a worker of a process pool). since is
+        # get_snapshot() of this log when the copy was made
+        if other is self:
+            return
+        if since is None:
+            since = (0, 0, 0.0, 0.0, Counter(), Counter())
+        failure_count, verified, seconds, thread_seconds, by_sender, by_reason = since
+        new_failures = other.__failures[min(failure_count, len(other.__failures)):]
+        self.__failures += new_failures[:max(0, self.__keep_failures - len(self.__failures))]
+        self.__failure_count += other.__failure_count - failure_count
+        self.__failures_by_sender.update(other.__failures_by_sender - by_sender)
+        self.__failures_by_reason.update(other.__failures_by_reason - by_reason)
+        self.__verified += other.__verified - verified
+        self.__seconds += other.__seconds - seconds
+        self.__thread_seconds += other.__thread_seconds - thread_seconds
@@ -0,0 +1,158 @@
+import numpy as np
+from typing import TextIO, TYPE_CHECKING
+
+from classes.eig_decide import decide_levels
+from classes.eig_index import get_append_slots, get_fan_out, get_level_slots, rank_paths, NO_VAL
+from classes.message import FrontierMessage, Message
+from classes.tree_export import to_networkx, write_log
+from classes.tree_render import plot_tree
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+MAX_PROC_COUNT = 63  # slot paths are tracked as uint64 bit masks, one bit per proc uid
+
+
+# Same interface as EIGByzTree, but every level is stored as a flat value array instead of Node objects.
+# Children of a slot are the proc uids that are not on its path in increasing order (same order as
+# EIGByzTree), so the children of slot i of level k - 1 are the slots [i * fan_out, (i + 1) * fan_out)
+# of level k with fan_out = proc_count - k + 1, and the parent of a slot is its index // fan_out.
+# The proc uid of each slot only depends on proc_count, so it is shared by all trees (get_level_slots).
+class ArrayEIGByzTree:
+    def __init__(self, proc_uid: int, proc_count: int, proc_val: int):
+        if proc_count > MAX_PROC_COUNT:
+            raise ValueError(f'array tree supports at most {MAX_PROC_COUNT} processes, got {proc_count}')
+        self.__proc_uid = proc_uid
+        self.__proc_count = proc_count
+        self.__vals = [np.array([proc_val], dtype=np.int8)]
+        self.__decisions = None
+        self.__decision = None
+
+    def get_proc_uid(self) -> int:
+        return self.__proc_uid
+
+    def get_proc_count(self) -> int:
+        return self.__proc_count
+
+    def get_decision(self) -> int:
+        return self.__decision
+
+    def get_tree_height(self) -> int:
+        return len(self.__vals) - 1
+
+    def get_level_size(self, level: int) -> int:
+        return len(self.__vals[level])
+
+    def get_node_count(self) -> int:
+        return sum(len(vals) for vals in self.__vals)
+
+    def get_fan_out(self, level: int) -> int:
+        return get_fan_out(self.__proc_count, level)
+
+    def add_level(self):
+        level_size = len(get_level_slots(self.__proc_count, self.get_tree_height() + 1)[0])
+        self.__vals.append(np.full(level_size, NO_VAL, dtype=np.int8))
+        self.__decisions = None
+
+    def get_path(self, level: int, index: int) -> list[int]:
+        if level == 0:
+            return []
+        path = []
+        for lvl in range(level, 0, -1):
+            path.append(int(get_level_slots(self.__proc_count, lvl)[1][index]))
+            index //= self.get_fan_out(lvl)
+        path.append(-1)
+        path.reverse()
+        return path
+
+    def get_level_vals(self, level: int) -> np.ndarray:
+        return self.__vals[level].copy()
+
+    def get_level_decisions(self, level: int) -> np.ndarray:
+        if self.__decisions is None:
+            return np.full(len(self.__vals[level]), NO_VAL, dtype=np.int8)
+        return self.__decisions[level].copy()
+
+    def __get_val(self, level: int, index: int) -> int | None:
+        val = int(self.__vals[level][index])
+        return None if val == NO_VAL else val
+
+    def __get_node_decision(self, level: int, index: int) -> int | None:
+        if self.__decisions is None:
+            return None
+        decision = int(self.__decisions[level][index])
+        return None if decision == NO_VAL else decision
+
+    def __node_str(self, level: int, index: int) -> str:
+        path = ''.join(str(p) for p in self.get_path(level, index)[1:])
+        if level == self.get_tree_height():
+            return f'path: {path}, val: {self.__get_val(level, index)}'
+        else:
+            return f'path: {path}'
+
+    def log(self, file: TextIO = None) -> str | None:
+        return write_log(self, self.__node_str, file)
+
+    def __str__(self):
+        return self.log()
+
+    def __repr__(self):
+        return self.__str__()
+
+    def convert_to_networkx_graph(self, id_type: str = 'int') -> 'nx.Graph':
+        return to_networkx(self, id_type)
+
+    def get_decision_colors(self) -> list[str]:
+        res = []
+        for level in range(self.get_tree_height() + 1):
+            for i in range(len(self.__vals[level])):
+                match self.__get_node_decision(level, i):
+                    case 1:
+                        color = 'lawngreen'
+                    case 0:
+                        color = 'crimson'
+                    case _:
+                        color = 'deepskyblue'
+                res.append(color)
+        return res
+
+    def plot_tree(self, fig_size: tuple[int, int] = (75, 10), path: str = None, node_size: int = 1200,
+                  show_step_plots: bool = True):
+        plot_tree(self, fig_size=fig_size, path=path, node_size=node_size, show_step_plots=show_step_plots)
+
+    def get_message(self) -> FrontierMessage:
+        return FrontierMessage(self.__vals[-1].copy(), sender=self.get_proc_uid(), proc_count=self.__proc_count,
+                               level=self.get_tree_height())
+
+    def apply_msg(self, msg: Message | FrontierMessage):
+        if isinstance(msg, FrontierMessage):
+            self.__apply_frontier_msg(msg)
+            return
+        # all contents of a message come from the sender's leaves, so they share one level
+        msg_contents = msg.get_content_view()
+        if len(msg_contents) == 0:
+            return
+        sender = (msg.get_sender(),)
+        paths = [msg_content.get_path()[1:] + sender for msg_content in msg_contents]
+        level = len(paths[0])
+        if level > self.get_tree_height():
+            return
+        ranks = rank_paths(self.__proc_count, np.array(paths).reshape(len(paths), level))
+        vals = np.array([NO_VAL if mc.get_val() is None else mc.get_val() for mc in msg_contents], dtype=np.int8)
+        valid = ranks >= 0
+        self.__vals[level][ranks[valid]] = vals[valid]
+
+    def __apply_frontier_msg(self, msg: FrontierMessage):
+        level = msg.get_level() + 1
+        if level > self.get_tree_height():
+            return
+        slots = get_append_slots(self.__proc_count, msg.get_level(), msg.get_sender())
+        valid = slots >= 0
+        self.__vals[level][slots[valid]] = msg.get_vals()[valid]
+
+    def decide(self, vectorized: bool = False):
+        # levels are already arrays, so the decision is always computed level by level; vectorized is taken
+        # for the same signature as the node trees and gives the same result either way
+        self.__decisions = decide_levels(self.__vals[-1], self.__proc_count, self.get_tree_height())
+        self.__decision = int(self.__decisions[0][0])
+        return self.__decision
@@ -0,0 +1,112 @@
+import numpy as np
+
+from classes.eig_decide import decide_levels
+from classes.eig_index import get_level_slots
+from classes.sim_random import draw_byz_proc_uids, draw_initial_vals, draw_lie_mask, spawn_rngs
+
+MAX_PROC_COUNT = 63
+
+
+# Runs EIGByz for all processes at once. The trees of all processes are stacked in one array per
+# level with shape (proc_count, level_size). In round k, slot j of level k of every receiver gets the
+# value that the process at the end of its path had at the parent slot of j, so honest exchange is a
+# single gather; Byzantine senders flip a random mask of their values for each receiver.
+class BatchedEIGByzSim:
+    def __init__(self, proc_count: int, byz_proc_count: int, initial_vals: list[int] = None, byz_prob: int = 50,
+                 seed: int | list[int] = None):
+        if proc_count > MAX_PROC_COUNT:
+            raise ValueError(f'batched simulation supports at most {MAX_PROC_COUNT} processes, got {proc_count}')
+        # setup choices and the lies of every process come from streams of seed (classes/sim_random.py)
+        self.__rng, self.__proc_rngs = spawn_rngs(seed, proc_count)
+        self.__proc_count = proc_count
+        self.__byz_proc_count = byz_proc_count
+        self.__set_byz_proc_uid_list()
+        self.__byz_prob = byz_prob
+        self.__set_initial_vals(initial_vals)
+        self.__levels = [np.array(self.__initial_vals, dtype=np.int8).reshape(proc_count, 1)]
+        self.__decisions = None
+
+    def __set_byz_proc_uid_list(self):
+        self.__byz_proc_uid_list = draw_byz_proc_uids(self.__rng, self.__proc_count, self.__byz_proc_count)
+
+    def __set_initial_vals(self, initial_vals: list[int] = None):
+        if initial_vals is None:
+            initial_vals = draw_initial_vals(self.__rng, self.__proc_count)
+        self.__initial_vals = initial_vals.copy()
+
+    def get_byz_proc(self):
+        return self.__byz_proc_uid_list.copy()
+
+    def get_proc_initial_vals(self):
+        return self.__initial_vals.copy()
+
+    def get_levels(self) -> list[np.ndarray]:
+        return self.__levels
+
+    def __exchange_round(self):
+        last_level = self.__levels[-1]
+        parents, uids, _ = get_level_slots(self.__proc_count, len(self.__levels))
+        senders = uids - 1
+        new_level = np.tile(last_level[senders, parents], (self.__proc_count, 1))
+        byz_slots = [(uid, np.flatnonzero(senders == uid - 1)) for uid in sorted(self.__byz_proc_uid_list)]
+        # every sender draws one lie mask per receiver from its own stream, in receiver order, as a
+        # Process of EIGByzSim does, so both simulations tell the same lies for the same seed
+        for receiver in range(self.__proc_count):
+            for uid, slots in byz_slots:
+                lies = draw_lie_mask(self.__proc_rngs[uid - 1], last_level.shape[1], self.__byz_prob)
+                new_level[receiver, slots] ^= lies[parents[slots]].astype(np.int8)
+        self.__levels.append(new_level)
+
+    def __decide(self):
+        height = len(self.__levels) - 1
+        self.__decisions = decide_levels(self.__levels[-1], self.__proc_count, height)
+
+    def get_final_decision(self) -> list[int]:
+        if self.__decisions is None:
+            return [None] * self.__proc_count
+        return self.__decisions[0][:, 0].tolist()
+
+    def apply_algo(self, step_number: int = None):
+        if step_number is None:
+            step_number = self.__byz_proc_count + 1
+        if step_number > self.__proc_count:
+            raise Exception(f'tree-has been completed with height: {self.__proc_count}')
+        for _ in range(step_number):
+            self.__exchange_round()
+        self.__decide()
+        return self.get_final_decision()
+
+    def __get_correct_uids(self) -> list[int]:
+        return [uid for uid in range(1, self.__proc_count + 1) if uid not in self.__byz_proc_uid_list]
+
+    def check_agreement(self) -> bool:
+        decisions = self.get_final_decision()
+        decision_set = {decisions[uid - 1] for uid in self.__get_correct_uids()}
+        return len(decision_set) == 1
+
+    def check_validity(self) -> bool:
+        initial_values_set = {self.__initial_vals[uid - 1] for uid in self.__get_correct_uids()}
+        if len(initial_values_set) > 1:
+            return True
+        decisions = self.get_final_decision()
+        decision_set = {decisions[uid - 1] for uid in self.__get_correct_uids()}
+        return decision_set == initial_values_set
+
+    def check_termination(self) -> bool:
+        decisions = self.get_final_decision()
+        return all(decisions[uid - 1] is not None for uid in self.__get_correct_uids())
+
+    def check_requirements(self) -> str:
+        validity = self.check_validity()
+        termination = self.check_termination()
+        agreement = self.check_agreement()
+        if validity and termination and agreement:
+            return '-'
+        res = []
+        if not validity:
+            res.append('validity')
+        if not termination:
+            res.append('termination')
+        if not agreement:
+            res.append('agreement')
+        return '-'.join(res)
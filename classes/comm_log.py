@@ -0,0 +1,97 @@
+import csv
+import json
+import numpy as np
+from typing import NamedTuple
+
+# Communication accounting of a simulation run. apply_algo(comm_log=CommLog()) records every message of every
+# round per sender -> receiver pair: the contents it carries, its serialized size (the wire format of
+# classes/message.py, signature chains included) and how many of those bytes are signature data. The
+# per-round summary answers how much a run puts on the wire, write_csv gives one row per pair for plotting.
+
+
+class PairRecord(NamedTuple):
+    round_number: int
+    sender: int
+    receiver: int
+    contents: int
+    bytes: int
+    signature_bytes: int
+
+
+class CommLog:
+    def __init__(self):
+        self.__records = []
+        self.__sizes = {}  # message id -> (contents, bytes, signature bytes) of the round being recorded
+        self.__sizes_round = None
+
+    def record(self, record: PairRecord):
+        self.__records.append(record)
+
+    def record_msgs(self, round_number: int, receiver: int, msgs: list):
+        # messages shared by many receivers are sized once per round; the sizes are dropped when the next
+        # round starts, while the messages of the round are still alive in the inboxes
+        if round_number != self.__sizes_round:
+            self.__sizes, self.__sizes_round = {}, round_number
+        for msg in msgs:
+            size = self.__sizes.get(id(msg))
+            if size is None:
+                size = self.__sizes[id(msg)] = (msg.get_content_count(), msg.get_serialized_size(),
+                                                msg.get_signature_size())
+            self.record(PairRecord(round_number, msg.get_sender(), receiver, *size))
+
+    def get_records(self) -> list[PairRecord]:
+        return self.__records.copy()
+
+    def get_rounds(self) -> list[int]:
+        return sorted({record.round_number for record in self.__records})
+
+    def get_matrix(self, round_number: int, field: str = 'bytes', proc_count: int = None) -> np.ndarray:
+        # field of every pair of the round, row sender - 1 and column receiver - 1
+        records = [record for record in self.__records if record.round_number == round_number]
+        if proc_count is None:
+            proc_count = max((max(record.sender, record.receiver) for record in records), default=0)
+        matrix = np.zeros((proc_count, proc_count), dtype=np.int64)
+        for record in records:
+            matrix[record.sender - 1, record.receiver - 1] += getattr(record, field)
+        return matrix
+
+    def get_round_summary(self) -> list[dict]:
+        summary = []
+        for round_number in self.get_rounds():
+            records = [record for record in self.__records if record.round_number == round_number]
+            total_bytes = sum(record.bytes for record in records)
+            summary.append({'round_number': round_number, 'messages': len(records),
+                            'contents': sum(record.contents for record in records), 'bytes': total_bytes,
+                            'signature_bytes': sum(record.signature_bytes for record in records),
+                            'max_pair_bytes': max(record.bytes for record in records),
+                            'mean_message_bytes': total_bytes / len(records)})
+        return summary
+
+    def get_totals(self) -> dict:
+        total_bytes = sum(record.bytes for record in self.__records)
+        return {'round_number': None, 'messages': len(self.__records),
+                'contents': sum(record.contents for record in self.__records), 'bytes': total_bytes,
+                'signature_bytes': sum(record.signature_bytes for record in self.__records),
+                'max_pair_bytes': max((record.bytes for record in self.__records), default=0),
+                'mean_message_bytes': total_bytes / len(self.__records) if self.__records else 0}
+
+    def format_table(self) -> str:
+        lines = [f'{"round":>6}{"messages":>10}{"contents":>10}{"KiB":>12}{"signature KiB":>15}'
+                 f'{"max pair B":>12}{"mean msg B":>12}']
+        for row in self.get_round_summary() + [self.get_totals()]:
+            lines.append(f'{"all" if row["round_number"] is None else row["round_number"]:>6}{row["messages"]:>10}'
+                         f'{row["contents"]:>10}{row["bytes"] / 1024:>12.1f}{row["signature_bytes"] / 1024:>15.1f}'
+                         f'{row["max_pair_bytes"]:>12}{row["mean_message_bytes"]:>12.1f}')
+        return '\n'.join(lines)
+
+    def write_csv(self, path: str):
+        # one row per sender -> receiver pair and round
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(PairRecord._fields)
+            writer.writerows(self.__records)
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'rounds': self.get_round_summary(), 'totals': self.get_totals(),
+                       'pairs': [record._asdict() for record in self.__records]}, f, indent=1)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from classes.eig_index import get_fan_out
+
+# Bottom-up majority over whole tree levels. levels[k] holds the slots of level k in EIG order, so the
+# children of slot i of level k - 1 are the row i of levels[k].reshape(-1, fan_out). decide_levels also
+# accepts leading axes (e.g. one row per process) and decides every row independently.
+
+NOT_DECIDED = -1  # AuthNode default decision
+UNAUTHED = -2  # stands for the None decision of an unauthenticated AuthNode
+
+
+def decide_levels(leaf_vals: np.ndarray, proc_count: int, height: int) -> list[np.ndarray]:
+    decisions = [None] * (height + 1)
+    decisions[height] = np.asarray(leaf_vals, dtype=np.int8)
+    for level in range(height, 0, -1):
+        fan_out = get_fan_out(proc_count, level)
+        children = decisions[level].reshape(*decisions[level].shape[:-1], -1, fan_out)
+        decisions[level - 1] = (children.sum(axis=-1, dtype=np.int64) > fan_out // 2).astype(np.int8)
+    return decisions
+
+
+def auth_decide_levels(vals: list[np.ndarray], authed: list[np.ndarray], proc_count: int) -> list[np.ndarray]:
+    # same result as AuthNode.decide on a freshly built tree. vals use -1 for None. AuthNode.decide only
+    # visits the children of a node if the node is not authenticated or the child is, so the nodes it
+    # never reaches keep NOT_DECIDED, reached unauthenticated nodes get UNAUTHED and reached
+    # authenticated nodes get the majority of their authenticated children (leaves use their val).
+    height = len(vals) - 1
+    majority = [None] * (height + 1)
+    majority[height] = np.where(vals[height] == -1, 0, vals[height]).astype(np.int8)
+    for level in range(height, 0, -1):
+        fan_out = get_fan_out(proc_count, level)
+        child_authed = authed[level].reshape(-1, fan_out)
+        ones = (child_authed & (majority[level].reshape(-1, fan_out) == 1)).sum(axis=1)
+        majority[level - 1] = (ones > child_authed.sum(axis=1) // 2).astype(np.int8)
+    decisions = [None] * (height + 1)
+    reached = np.ones(1, dtype=bool)
+    for level in range(height + 1):
+        if level > 0:
+            fan_out = get_fan_out(proc_count, level)
+            parent_reached = np.repeat(reached, fan_out)
+            parent_unauthed = np.repeat(~authed[level - 1], fan_out)
+            reached = parent_reached & (parent_unauthed | authed[level])
+        decision = np.where(authed[level], majority[level], UNAUTHED).astype(np.int8)
+        decisions[level] = np.where(reached, decision, NOT_DECIDED).astype(np.int8)
+    return decisions
@@ -0,0 +1,107 @@
+import numpy as np
+
+from functools import lru_cache
+
+# EIG tree slots of a level are ordered by parent and then by proc uid, so a repetition-free path
+# (p1, ..., pk) of proc uids has a combinatorial rank inside its level:
+#   rank = sum over j of pos_j * fan_out(j + 1) * ... * fan_out(k)
+# where pos_j is the position of p_j among the uids that are not in (p1, ..., p_j-1).
+# Paths here never contain the -1 root marker that MessageContent paths start with.
+
+NO_VAL = -1  # stands for a None value in packed int8 value arrays
+
+
+def get_fan_out(proc_count: int, level: int) -> int:
+    return proc_count - level + 1
+
+
+def get_level_size(proc_count: int, level: int) -> int:
+    size = 1
+    for lvl in range(1, level + 1):
+        size *= get_fan_out(proc_count, lvl)
+    return size
+
+
+def rank_path(proc_count: int, path: tuple[int, ...] | list[int]) -> int | None:
+    rank = 0
+    used = 0
+    for level, uid in enumerate(path, start=1):
+        if uid < 1 or uid > proc_count or used >> uid & 1:
+            return None
+        pos = uid - 1 - (used & ((1 << uid) - 1)).bit_count()
+        rank = rank * get_fan_out(proc_count, level) + pos
+        used |= 1 << uid
+    return rank
+
+
+def rank_paths(proc_count: int, paths: np.ndarray) -> np.ndarray:
+    # paths has one path per row, all of the same length. rows that are not valid paths get rank -1
+    paths = np.asarray(paths, dtype=np.int64)
+    count, length = paths.shape
+    ranks = np.zeros(count, dtype=np.int64)
+    valid = np.all((paths >= 1) & (paths <= proc_count), axis=1)
+    for level in range(1, length + 1):
+        uid = paths[:, level - 1]
+        pos = uid - 1
+        for prev in range(level - 1):
+            pos -= paths[:, prev] < uid
+            valid &= paths[:, prev] != uid
+        ranks = ranks * get_fan_out(proc_count, level) + pos
+    ranks[~valid] = -1
+    return ranks
+
+
+def unrank_path(proc_count: int, level: int, rank: int) -> list[int]:
+    positions = []
+    for lvl in range(level, 0, -1):
+        fan_out = get_fan_out(proc_count, lvl)
+        positions.append(rank % fan_out)
+        rank //= fan_out
+    available = list(range(1, proc_count + 1))
+    return [available.pop(pos) for pos in reversed(positions)]
+
+
+@lru_cache(maxsize=None)
+def get_level_slots(proc_count: int, level: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # for every slot of the level: index of its parent slot, proc uid at the end of its path and the path
+    # as a bit mask (bit i set if proc uid i is on it). the arrays are shared, so they are read-only
+    if level == 0:
+        slots = np.zeros(1, dtype=np.int64), np.full(1, -1, dtype=np.int64), np.zeros(1, dtype=np.uint64)
+    else:
+        parent_masks = get_level_slots(proc_count, level - 1)[2]
+        candidates = np.arange(1, proc_count + 1, dtype=np.uint64)
+        available = (parent_masks[:, None] >> candidates) & np.uint64(1) == 0
+        parents, child_uids = np.nonzero(available)  # row-major, so grouped by parent with sorted uids
+        child_uids = candidates[child_uids]
+        masks = parent_masks[parents] | (np.uint64(1) << child_uids)
+        slots = parents.astype(np.int64), child_uids.astype(np.int64), masks
+    for arr in slots:
+        arr.setflags(write=False)
+    return slots
+
+
+@lru_cache(maxsize=None)
+def get_level_paths(proc_count: int, level: int) -> np.ndarray:
+    # row i is the path of slot i of the level
+    if level == 0:
+        paths = np.zeros((1, 0), dtype=np.int64)
+    else:
+        parents, uids, _ = get_level_slots(proc_count, level)
+        paths = np.concatenate([get_level_paths(proc_count, level - 1)[parents], uids[:, None]], axis=1)
+    paths.setflags(write=False)
+    return paths
+
+
+@lru_cache(maxsize=None)
+def get_append_slots(proc_count: int, level: int, sender: int) -> np.ndarray:
+    # slot of level + 1 whose path is (path of slot i of level) + (sender,), or -1 if sender is on that path.
+    # this is where a receiver stores the value that sender reported for its slot i
+    masks = get_level_slots(proc_count, level)[2]
+    on_path = (masks >> np.uint64(sender)) & np.uint64(1) == 1
+    smaller_on_path = np.zeros(len(masks), dtype=np.int64)
+    for uid in range(1, sender):
+        smaller_on_path += ((masks >> np.uint64(uid)) & np.uint64(1)).astype(np.int64)
+    slots = np.arange(len(masks), dtype=np.int64) * get_fan_out(proc_count, level + 1) + sender - 1 - smaller_on_path
+    slots[on_path] = -1
+    slots.setflags(write=False)
+    return slots
@@ -1,12 +1,20 @@
-import matplotlib.pyplot as plt
-
-import random
 import os
+from contextlib import nullcontext
+
+from classes.comm_log import CommLog
+from classes.sim_metrics import count_messages, SimMetrics
+from classes.sim_random import draw_byz_proc_uids, draw_initial_vals, spawn_rngs
+from classes.sim_shards import add_tree_level, apply_msgs, decide, generate_msgs, get_node_counts, \
+    get_tree_snapshots, LocalShards, ProcessShards, receive_msgs
+from classes.tree_render import TreeRenderer
+from classes.tree_snapshot import save_snapshots, TreeSnapshot
 
+from classes.eig_tree import EIGByzTree
 from classes.process import Process
 
 
 def save_plot(path):
+    import matplotlib.pyplot as plt
     generate_file(path)
     plt.savefig(path)
 
@@ -18,8 +26,14 @@ def generate_file(path):
 
 
 class EIGByzSim:
-    def __init__(self, proc_count: int, byz_proc_count: int, initial_vals: list[int] = None, byz_prob: int = 50):
+    def __init__(self, proc_count: int, byz_proc_count: int, initial_vals: list[int] = None, byz_prob: int = 50,
+                 tree_type: type = EIGByzTree, seed: int | list[int] = None):
+        # setup choices and the lies of every process come from streams of seed (classes/sim_random.py)
+        self.__rng, self.__proc_rngs = spawn_rngs(seed, proc_count)
         self.__proc_count = proc_count
+        self.__snapshots = {}
+        self.__shards = None  # shards of the processes during apply_algo (classes/sim_shards.py)
+        self.__tree_type = tree_type
         self.__byz_proc_count = byz_proc_count
         self.__set_byz_proc_uid_list()
         self.__byz_prob = byz_prob
@@ -32,14 +46,14 @@ class EIGByzSim:
     def __generate_proc_with_uid(self, uid):
         is_byz = uid in self.__byz_proc_uid_list
         return Process(proc_uid=uid, proc_count=self.__proc_count, proc_val=self.__initial_vals[uid - 1], is_byz=is_byz,
-                       lie_prob=self.__byz_prob)
+                       lie_prob=self.__byz_prob, tree_type=self.__tree_type, rng=self.__proc_rngs[uid - 1])
 
     def __set_byz_proc_uid_list(self):
-        self.__byz_proc_uid_list = random.sample(list(range(1, self.__proc_count + 1)), self.__byz_proc_count)
+        self.__byz_proc_uid_list = draw_byz_proc_uids(self.__rng, self.__proc_count, self.__byz_proc_count)
 
     def __set_initial_vals(self, initial_vals: list[int] = None):
         if initial_vals is None:
-            initial_vals = random.choices([0, 1], k=self.__proc_count)
+            initial_vals = draw_initial_vals(self.__rng, self.__proc_count)
         self.__initial_vals = initial_vals.copy()
 
     def get_byz_proc(self):
@@ -48,61 +62,130 @@ class EIGByzSim:
     def get_proc_initial_vals(self):
         return self.__initial_vals.copy()
 
-    def __send_all_messages(self):
-        for p in self.__processes:
-            # generating messages for each process specifically because byzantine process be able
-            # to send different messages for different processes
-            msgs = self.__generate_all_messages()
-            p.receive_msgs(msgs)
-
-    def __generate_all_messages(self):
-        msgs = [p.generate_msg() for p in self.__processes]
-        return msgs
+    def __send_all_messages(self, round_number: int, counts: dict[str, int] = None, comm_log: CommLog = None):
+        # every process generates its message once per round. honest processes share it with all recipients
+        # and byzantine processes derive a different lying copy of it for each recipient
+        msgs_by_sender = self.__shards.run(generate_msgs, self.__proc_count)
+        inboxes = [list(msgs) for msgs in zip(*msgs_by_sender)]
+        self.__shards.run(receive_msgs, per_process=inboxes)
+        sizes = {}
+        for receiver, msgs in zip(self.__processes, inboxes):
+            if counts is not None:
+                count_messages(counts, msgs, sizes)
+            if comm_log is not None:
+                comm_log.record_msgs(round_number, receiver.get_proc_uid(), msgs)
+
+    def __measure(self, metrics: SimMetrics | None, round_number: int | None, phase: str):
+        # without metrics nothing is measured or counted
+        if metrics is None:
+            return nullcontext()
+        return metrics.measure(round_number, phase, self.__get_totals)
+
+    def __get_totals(self) -> dict[str, int]:
+        return {'nodes': sum(self.__shards.run(get_node_counts))}
 
     def __add_tree_level(self):
-        for p in self.__processes:
-            p.add_tree_level()
+        self.__shards.run(add_tree_level)
 
-    def __apply_messages(self):
-        for p in self.__processes:
-            p.apply_msgs()
+    def __apply_messages(self, round_number: int):
+        self.__shards.run(apply_msgs, round_number)
 
     def __save_step_plot(self, base_path: str, step: int, node_size: int, fig_size: tuple[int, int],
-                         show_step_plots: bool):
-        for p in self.__processes:
-            path = base_path + f'step-{step}/proc-{p.get_proc_uid()}.png'
-            p.plot_tree(fig_size=fig_size, node_size=node_size, path=path, show_step_plots=show_step_plots)
-
-    def __plot_final_decision(self, base_path: str, node_size: int, fig_size: tuple[int, int]):
-        for p in self.__processes:
-            path = base_path + f'final-decision/proc-{p.get_proc_uid()}.png'
-            p.plot_tree(fig_size=fig_size, node_size=node_size, path=path)
-
-    def __decide(self):
-        for p in self.__processes:
-            p.decide()
+                         show_step_plots: bool, renderer: TreeRenderer = None):
+        if renderer is None:
+            for p in self.__processes:
+                p.plot_tree(fig_size=fig_size, node_size=node_size, show_step_plots=show_step_plots,
+                            path=base_path + f'step-{step}/proc-{p.get_proc_uid()}.png')
+            return
+        for p, snapshot in zip(self.__processes, self.__shards.run(get_tree_snapshots)):
+            renderer.submit(snapshot, base_path + f'step-{step}/proc-{p.get_proc_uid()}.png', fig_size=fig_size,
+                            node_size=node_size)
+
+    def __record_snapshots(self, snapshots: dict[str, TreeSnapshot], directory: str):
+        for p, snapshot in zip(self.__processes, self.__shards.run(get_tree_snapshots)):
+            snapshots[f'{directory}/proc-{p.get_proc_uid()}.png'] = snapshot
+
+    def get_snapshots(self) -> dict[str, TreeSnapshot]:
+        # snapshots of the last headless apply_algo, keyed by the path of the plot they stand for
+        return self.__snapshots.copy()
+
+    def __plot_final_decision(self, base_path: str, node_size: int, fig_size: tuple[int, int],
+                              renderer: TreeRenderer = None):
+        if renderer is None:
+            for p in self.__processes:
+                p.plot_tree(fig_size=fig_size, node_size=node_size,
+                            path=base_path + f'final-decision/proc-{p.get_proc_uid()}.png')
+            return
+        for p, snapshot in zip(self.__processes, self.__shards.run(get_tree_snapshots)):
+            renderer.submit(snapshot, base_path + f'final-decision/proc-{p.get_proc_uid()}.png', fig_size=fig_size,
+                            node_size=node_size)
+
+    def __decide(self, vectorized: bool):
+        self.__shards.run(decide, vectorized)
 
     def get_final_decision(self) -> list[int]:
         return [p.get_decision() for p in self.__processes]
 
     def apply_algo(self, save_step_plot: bool = True, show_step_plots: bool = False, save_decision_plot: bool = True,
                    base_path: str = 'results/', fig_size: tuple[int, int] = (15, 5), node_size: int = None,
-                   step_number: int = None):
+                   step_number: int = None, vectorized_decide: bool = False,
+                   workers: int = None, headless: bool = False, render_workers: int = None,
+                   renderer: TreeRenderer = None, metrics: SimMetrics = None,
+                   comm_log: CommLog = None):
         if step_number is None:
             step_number = self.__byz_proc_count + 1
         if node_size is None:
             node_size = 1000 + self.__proc_count * 100
         if base_path is not None:
             base_path += f'proc-{self.__proc_count}-byz-{self.__byz_proc_count}-r-{step_number}/'
-        for i in range(1, step_number + 1):
-            self.__send_all_messages()
-            self.__add_tree_level()
-            self.__apply_messages()
-            if save_step_plot:
-                self.__save_step_plot(base_path, i, node_size, fig_size, show_step_plots=show_step_plots)
-        self.__decide()
-        if save_decision_plot:
-            self.__plot_final_decision(base_path, node_size, fig_size)
+        # with workers, the processes are sharded across worker processes that keep them for the whole run
+        # (classes/sim_shards.py); the result is the same as running them here since every process only works
+        # on its own tree and inbox. showing plots needs the trees here, so it can not be combined with workers
+        sharded = workers is not None and workers > 1
+        if sharded and show_step_plots:
+            raise ValueError('show_step_plots can not be combined with workers')
+        # headless runs record a snapshot instead of every plot, classes/tree_render.py renders them later
+        self.__snapshots = {}
+        # saved plots are rendered with the layout of every tree shape computed once (classes/tree_render.py),
+        # here by default and in the background by a pool of render_workers processes if that is given.
+        # showing plots needs pyplot, so then they are drawn here one by one
+        plotting = (save_step_plot or save_decision_plot) and not headless
+        own_renderer = plotting and renderer is None and not show_step_plots
+        if own_renderer:
+            renderer = TreeRenderer(1 if render_workers is None else render_workers)
+        elif show_step_plots:
+            renderer = None
+        shards = ProcessShards(self.__processes, workers) if sharded else LocalShards(self.__processes)
+        with shards, renderer if own_renderer else nullcontext():
+            self.__shards = shards
+            # with metrics every phase is recorded (classes/sim_metrics.py), round None is after the last round.
+            # with comm_log every message is recorded per sender and receiver (classes/comm_log.py)
+            for i in range(1, step_number + 1):
+                with self.__measure(metrics, i, 'send') as counts:
+                    self.__send_all_messages(i, counts, comm_log)
+                with self.__measure(metrics, i, 'add_level'):
+                    self.__add_tree_level()
+                with self.__measure(metrics, i, 'apply'):
+                    self.__apply_messages(i)
+                if save_step_plot:
+                    with self.__measure(metrics, i, 'plot'):
+                        if headless:
+                            self.__record_snapshots(self.__snapshots, f'step-{i}')
+                        else:
+                            self.__save_step_plot(base_path, i, node_size, fig_size, show_step_plots, renderer)
+            with self.__measure(metrics, None, 'decide'):
+                self.__decide(vectorized_decide)
+            if save_decision_plot or plotting:
+                with self.__measure(metrics, None, 'plot'):
+                    if save_decision_plot and headless:
+                        self.__record_snapshots(self.__snapshots, 'final-decision')
+                    elif save_decision_plot:
+                        self.__plot_final_decision(base_path, node_size, fig_size, renderer)
+                    if plotting and renderer is not None:
+                        renderer.wait()
+        self.__shards = None
+        if len(self.__snapshots) > 0 and base_path is not None:
+            save_snapshots(base_path, self.__snapshots)
         return self.get_final_decision()
 
     def check_agreement(self) -> bool:
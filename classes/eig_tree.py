@@ -1,21 +1,17 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import os
+import numpy as np
+from typing import Iterator, TextIO, TYPE_CHECKING
 
+from classes.eig_decide import decide_levels
+from classes.eig_index import get_append_slots, get_level_paths, get_level_slots, rank_path, NO_VAL
+from classes.message import FrontierMessage, Message
 from classes.node import Node
-from classes.message import Message, MessageContent
-from external.plot_tree import hierarchy_pos
+from classes.tree_export import to_networkx, write_log
+from classes.tree_render import plot_tree
+from classes.tree_traversal import check_order, iter_depth_first, LEVEL_ORDER
 
 
-def save_plot(path):
-    generate_file(path)
-    plt.savefig(path)
-
-
-def generate_file(path):
-    dir = os.path.dirname(path)
-    if not os.path.exists(dir):
-        os.makedirs(dir)
+if TYPE_CHECKING:
+    import networkx as nx
 
 
 class EIGByzTree:
@@ -23,7 +19,11 @@ class EIGByzTree:
         self.__proc_uid = proc_uid
         self.__proc_count = proc_count
         self.__root = Node(parent=None, proc_uid=-1, val=proc_val, path=[])
+        self.__levels = [[self.__root]]  # nodes of every level in EIG slot order (classes/eig_index.py)
+        self.__vals = [np.array([proc_val], dtype=np.int8)]  # vals of the nodes of every level, NO_VAL for None
+        self.__node_count = 1
         self.__decision = None
+        self.__decisions = None  # level arrays of a vectorized decide that are not written to the nodes yet
 
     def get_proc_uid(self) -> int:
         return self.__proc_uid
@@ -35,43 +35,32 @@ class EIGByzTree:
         return self.__decision
 
     def add_level(self):
-        if self.__root.is_leaf():
-            for i in range(1, self.__proc_count + 1):
-                child = Node(parent=self.__root, proc_uid=i, val=None, path=[-1, i])
-                self.__root.add_child(child)
-        else:
-            for child in self.__root.get_children():
-                self.__add_level_non_root(node=child)
-
-    def __add_level_non_root(self, node):
-        if node.is_leaf():
-            for i in range(1, self.__proc_count + 1):
-                if i not in node.get_path():
-                    new_path = node.get_path() + [i]
-                    child = Node(parent=node, proc_uid=i, val=None, path=new_path)
-                    node.add_child(child)
-        else:
-            for child in node.get_children():
-                self.__add_level_non_root(node=child)
-
-    def log(self) -> str:
-        res = ''
-        res += f'root: {self.__root.get_proc_uid()}'
-        queue = []
-        if self.__root.is_leaf():
-            return res + f' val: {self.__root.get_val()}'
-        else:
-            queue = [c for c in self.__root.get_children()]
-        last_depth = 1
-        while len(queue) > 0:
-            node = queue.pop(0)
-            if node.get_depth() != last_depth:
-                last_depth += 1
-                res += '\n'
-            res += node.__str__() + ' ** '
-            if not node.is_leaf():
-                queue = queue + node.get_children()
-        return res
+        # only the frontier gets children: the uid and path of every new slot come from the cached slot
+        # arrays of classes/eig_index.py, in slot order
+        self.__write_decisions()
+        frontier = self.__levels[-1]
+        level = len(self.__levels)
+        parents, uids, _ = get_level_slots(self.__proc_count, level)
+        paths = get_level_paths(self.__proc_count, level)
+        new_level = []
+        for parent, uid, path in zip(parents.tolist(), uids.tolist(), paths.tolist()):
+            child = Node(parent=frontier[parent], proc_uid=uid, val=None, path=[-1] + path)
+            frontier[parent].add_child(child)
+            new_level.append(child)
+        self.__levels.append(new_level)
+        self.__vals.append(np.full(len(new_level), NO_VAL, dtype=np.int8))
+        self.__node_count += len(new_level)
+
+    def iter_nodes(self, order: str = LEVEL_ORDER) -> Iterator[Node]:
+        # lazily yields every node, level by level in slot order or depth first (classes/tree_traversal.py)
+        check_order(order)
+        self.__write_decisions()
+        if order == LEVEL_ORDER:
+            return (node for level in self.__levels for node in level)
+        return iter_depth_first(self.__root)
+
+    def log(self, file: TextIO = None) -> str | None:
+        return write_log(self, lambda level, slot: str(self.__levels[level][slot]), file)
 
     def __str__(self):
         return self.log()
@@ -79,97 +68,109 @@ class EIGByzTree:
     def __repr__(self):
         return self.__str__()
 
-    def convert_to_networkx_graph(self) -> nx.Graph:
-        graph = nx.Graph()
-        graph.add_node('-1')
-        queue = [self.__root]
-        while len(queue) > 0:
-            node = queue.pop(0)
-            path = ''.join(str(p) for p in node.get_path()[1:])
-            if not node.is_root():
-                parent = path[:-1] if len(path) > 1 else '-1'
-                graph.add_edge(parent, path)
-            if not node.is_leaf():
-                queue = queue + node.get_children()
-        return graph
+    def convert_to_networkx_graph(self, id_type: str = 'int') -> 'nx.Graph':
+        return to_networkx(self, id_type)
 
     def get_decision_colors(self) -> list[str]:
         res = []
-        queue = [self.__root]
-        while len(queue) > 0:
-            node = queue.pop(0)
-            match node.get_decision():
-                case 1:
-                    color = 'lawngreen'
-                case 0:
-                    color = 'crimson'
-                case _:
-                    color = 'deepskyblue'
-            res.append(color)
-            if not node.is_leaf():
-                queue = queue + node.get_children()
+        for level in range(len(self.__levels)):
+            for decision in self.get_level_decisions(level).tolist():
+                match decision:
+                    case 1:
+                        color = 'lawngreen'
+                    case 0:
+                        color = 'crimson'
+                    case _:
+                        color = 'deepskyblue'
+                res.append(color)
         return res
 
     def plot_tree(self, fig_size: tuple[int, int] = (75, 10), path: str = None, node_size: int = 1200,
                   show_step_plots: bool = True):
-        graph = self.convert_to_networkx_graph()
-        plt.figure(figsize=fig_size)
-        if self.__root.is_leaf():
-            pos = nx.spring_layout(graph)
-        else:
-            pos = hierarchy_pos(graph, '-1')
-        node_size_list = [node_size] * graph.number_of_nodes()
-        colors = self.get_decision_colors()
-        plt.title(f'process {self.get_proc_uid()} tree plot')
-        nx.draw(graph, pos=pos, with_labels=True, node_size=node_size_list, node_color=colors)
-        if path is not None:
-            save_plot(path)
-        if not show_step_plots:
-            plt.close()
+        plot_tree(self, fig_size=fig_size, path=path, node_size=node_size, show_step_plots=show_step_plots)
 
     def get_tree_height(self) -> int:
-        height = 0
-        node = self.__root
-        while not node.is_leaf():
-            node = node.get_children()[0]
-            height += 1
-        return height
-
-    def get_message(self) -> Message:
-        if self.__root.is_leaf():
-            msg_content = MessageContent(self.__root.get_path(), self.__root.get_val())
-            return Message([msg_content], sender=self.get_proc_uid())
-        else:
-            msg_contents = self.__get_messages(self.__root)
-            return Message(msg_contents, sender=self.get_proc_uid())
-
-    def __get_messages(self, node: Node) -> list[MessageContent]:
-        if node.is_leaf():
-            return [MessageContent(node.get_path(), node.get_val())]
+        return len(self.__levels) - 1
+
+    def get_level_size(self, level: int) -> int:
+        return len(self.__levels[level])
+
+    def get_node_count(self) -> int:
+        return self.__node_count
+
+    def get_frontier(self) -> list[Node]:
+        # nodes of the deepest level, the ones the next add_level and get_message work on
+        self.__write_decisions()
+        return self.__levels[-1].copy()
+
+    def get_message(self) -> FrontierMessage:
+        return FrontierMessage(self.__vals[-1].copy(), sender=self.get_proc_uid(), proc_count=self.__proc_count,
+                               level=len(self.__levels) - 1)
+
+    def get_node(self, path: tuple[int, ...]) -> Node | None:
+        if len(path) >= len(self.__levels):
+            return None
+        self.__write_decisions()
+        rank = rank_path(self.__proc_count, path)
+        return None if rank is None else self.__levels[len(path)][rank]
+
+    def apply_msg(self, msg: Message | FrontierMessage):
+        if isinstance(msg, FrontierMessage):
+            self.__apply_frontier_msg(msg)
+            return
+        sender = (msg.get_sender(),)
+        for msg_content in msg.get_content_view():
+            path = msg_content.get_path()[1:] + sender
+            slot = rank_path(self.__proc_count, path) if len(path) < len(self.__levels) else None
+            if slot is not None:
+                val = msg_content.get_val()
+                self.__levels[len(path)][slot].set_val(val)
+                self.__vals[len(path)][slot] = NO_VAL if val is None else val
+
+    def __apply_frontier_msg(self, msg: FrontierMessage):
+        level = msg.get_level() + 1
+        if level >= len(self.__levels):
+            return
+        slots = get_append_slots(self.__proc_count, msg.get_level(), msg.get_sender())
+        nodes = self.__levels[level]
+        valid = np.flatnonzero(slots >= 0)
+        for slot, val in zip(slots[valid].tolist(), msg.get_vals()[valid].tolist()):
+            nodes[slot].set_val(None if val == NO_VAL else val)
+        self.__vals[level][slots[valid]] = msg.get_vals()[valid]
+
+    def get_levels(self) -> list[list[Node]]:
+        self.__write_decisions()
+        return self.__levels.copy()
+
+    def get_level_vals(self, level: int) -> np.ndarray:
+        return self.__vals[level].copy()
+
+    def get_level_decisions(self, level: int) -> np.ndarray:
+        if self.__decisions is not None:
+            return self.__decisions[level].copy()
+        nodes = self.__levels[level]
+        return np.fromiter((NO_VAL if node.get_decision() is None else node.get_decision() for node in nodes),
+                           dtype=np.int8, count=len(nodes))
+
+    def decide(self, vectorized: bool = False):
+        if vectorized:
+            self.__decide_vectorized()
         else:
-            msg_contents = []
-            for child in node.get_children():
-                msg_contents += self.__get_messages(child)
-            return msg_contents
-
-    def apply_msg(self, msg: Message):
-        for msg_content in msg.get_content():
-            if len(msg_content.get_path_list()) == 0:
-                self.__apply_msg_content(self.__root, [msg.get_sender()], msg_content.get_val())
-            else:
-                path_from_root = msg_content.get_path_list()[1:] + [msg.get_sender()]
-                self.__apply_msg_content(self.__root, path_from_root, msg_content.get_val())
-
-    def __apply_msg_content(self, node: Node, path: list[int], val: int):
-        if path is None or len(path) == 0:
-            node.set_val(val)
-        else:
-            next_id = path[0]
-            for child in node.get_children():
-                if child.get_proc_uid() == next_id:
-                    self.__apply_msg_content(child, path[1:], val)
-                    break
-
-    def decide(self):
-        self.__decision = self.__root.decide()
+            self.__decisions = None
+            self.__decision = self.__root.decide()
         return self.__decision
+
+    def __decide_vectorized(self):
+        # decided from the val arrays, and decisions stay level arrays: the nodes only get theirs once a node
+        # is handed out (__write_decisions), so a run that only needs the decision, or the decision colors for
+        # a snapshot, never visits the nodes
+        self.__decisions = decide_levels(self.__vals[-1], self.__proc_count, len(self.__levels) - 1)
+        self.__decision = int(self.__decisions[0][0])
+
+    def __write_decisions(self):
+        if self.__decisions is None:
+            return
+        for nodes, level_decisions in zip(self.__levels, self.__decisions):
+            for node, decision in zip(nodes, level_decisions.tolist()):
+                node.set_decision(decision)
+        self.__decisions = None
@@ -1,22 +1,60 @@
+import numpy as np
+import struct
+
+from classes.eig_index import get_level_paths, NO_VAL
+
+# Messages are immutable once built, so one message can be shared by every recipient and the accessors
+# below hand out views instead of copies. get_path_list, get_content and Message.get_content are kept
+# for compatibility and still return fresh lists.
+#
+# serialize gives the bytes a message would take on the wire (get_serialized_size computes their length
+# without building them). integers are big endian:
+#   frontier message: sender u16, proc count u16, level u8, slot count u32, then one int8 value per slot
+#   content message:  sender u16, round u8 (0 for None), content count u32, then for every content the
+#                     path length u8, its uids (u8 each, without the -1 root marker) and the int8 value
+# auth messages add the signature chain of every content (classes/Auth/signature_chain.py encode_chain),
+# and an auth frontier message only carries its present slots, marked in a bitmap after the header.
+FRONTIER_HEADER = struct.Struct('>HHBI')
+CONTENT_HEADER = struct.Struct('>HBI')
+
+
+def encode_path(path: tuple[int, ...]) -> bytes:
+    uids = [p for p in path if p != -1]
+    return bytes([len(uids)] + uids)
+
+
+def encode_int8(val: int | None) -> bytes:
+    return struct.pack('>b', NO_VAL if val is None else val)
+
+
+def read_only(arr: np.ndarray) -> np.ndarray:
+    if arr.flags.writeable:
+        arr = arr.view()
+        arr.setflags(write=False)
+    return arr
+
+
 class MessageContent:
-    def __init__(self, path_list: list[int], val: int):
-        self.__path_list = path_list.copy()
+    __slots__ = ('__path', '__val')
+
+    def __init__(self, path_list: list[int] | tuple[int, ...], val: int):
+        self.__path = tuple(path_list)
         self.__val = val
 
+    def get_path(self) -> tuple[int, ...]:
+        return self.__path
+
     def get_path_list(self) -> list[int]:
-        return self.__path_list.copy()
+        return list(self.__path)
 
     def get_val(self) -> int:
         return self.__val
 
     def get_content(self) -> tuple[list[int], int]:
-        return self.__path_list.copy(), self.__val
-
-    def set_val(self, val: int):
-        self.__val = val
+        return list(self.__path), self.__val
 
     def __str__(self):
-        path = ''.join(str(p) for p in self.__path_list)
+        path = ''.join(str(p) for p in self.__path)
         return f'path: {path}, val: {self.__val}'
 
     def __repr__(self):
@@ -24,19 +62,113 @@ class MessageContent:
 
 
 class Message:
-    def __init__(self, content_list: list[MessageContent], sender: int):
-        self.__contents = content_list.copy()
+    __slots__ = ('__contents', '__sender', '__round_number')
+
+    def __init__(self, content_list: list[MessageContent] | tuple[MessageContent, ...], sender: int,
+                 round_number: int = None):
+        self.__contents = tuple(content_list)
         self.__sender = sender
+        self.__round_number = round_number  # round in which the message is sent, starting from 1
 
     def get_content(self) -> list[MessageContent]:
-        return self.__contents.copy()
+        return list(self.__contents)
+
+    def get_content_view(self) -> tuple[MessageContent, ...]:
+        return self.__contents
+
+    def get_content_count(self) -> int:
+        return len(self.__contents)
 
     def get_sender(self) -> int:
         return self.__sender
 
+    def get_round_number(self) -> int | None:
+        return self.__round_number
+
+    def get_signature_size(self) -> int:
+        return 0
+
+    def serialize(self) -> bytes:
+        contents = b''.join(encode_path(c.get_path()) + encode_int8(c.get_val()) for c in self.__contents)
+        return CONTENT_HEADER.pack(self.__sender, self.__round_number or 0, len(self.__contents)) + contents
+
+    def get_serialized_size(self) -> int:
+        return CONTENT_HEADER.size + sum(2 + len(c.get_path()) - (-1 in c.get_path()) for c in self.__contents)
+
+    def replace_contents(self, replaced: dict[int, MessageContent]) -> 'Message':
+        # the returned message shares every content that is not replaced with this one
+        if len(replaced) == 0:
+            return self
+        contents = tuple(replaced.get(i, content) for i, content in enumerate(self.__contents))
+        return Message(contents, sender=self.__sender, round_number=self.__round_number)
+
     def __str__(self):
         contents_str = [str(content) for content in self.__contents]
-        return f'sender: {self.get_sender()}\n' + '\n'.join(contents_str)
+        return f'sender: {self.get_sender()}, round: {self.get_round_number()}\n' + '\n'.join(contents_str)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class FrontierMessage:
+    # carries only the values of the sender's frontier (its deepest level) packed in slot order. the path of
+    # slot i is implied by the level through the shared EIG index scheme (classes/eig_index.py)
+    __slots__ = ('__vals', '__sender', '__proc_count', '__level')
+
+    def __init__(self, vals: np.ndarray, sender: int, proc_count: int, level: int):
+        self.__vals = read_only(np.asarray(vals, dtype=np.int8))
+        self.__sender = sender
+        self.__proc_count = proc_count
+        self.__level = level
+
+    def get_vals(self) -> np.ndarray:
+        return self.__vals
+
+    def get_sender(self) -> int:
+        return self.__sender
+
+    def get_proc_count(self) -> int:
+        return self.__proc_count
+
+    def get_level(self) -> int:
+        return self.__level
+
+    def get_round_number(self) -> int:
+        return self.__level + 1
+
+    def get_content_count(self) -> int:
+        return len(self.__vals)
+
+    def get_payload_size(self) -> int:
+        # bytes of the values, one per slot
+        return self.__vals.nbytes
+
+    def get_signature_size(self) -> int:
+        return 0
+
+    def serialize(self) -> bytes:
+        return FRONTIER_HEADER.pack(self.__sender, self.__proc_count, self.__level, len(self.__vals)) + \
+            self.__vals.tobytes()
+
+    def get_serialized_size(self) -> int:
+        return FRONTIER_HEADER.size + self.__vals.nbytes
+
+    def get_content(self) -> list[MessageContent]:
+        paths = get_level_paths(self.__proc_count, self.__level).tolist()
+        return [MessageContent([-1] + path if len(path) > 0 else [], None if val == NO_VAL else val)
+                for path, val in zip(paths, self.__vals.tolist())]
+
+    def replace_vals(self, replaced: dict[int, int]) -> 'FrontierMessage':
+        if len(replaced) == 0:
+            return self
+        vals = self.__vals.copy()
+        for i, val in replaced.items():
+            vals[i] = NO_VAL if val is None else val
+        return FrontierMessage(vals, sender=self.__sender, proc_count=self.__proc_count, level=self.__level)
+
+    def __str__(self):
+        contents_str = [str(content) for content in self.get_content()]
+        return f'sender: {self.get_sender()}, round: {self.get_round_number()}\n' + '\n'.join(contents_str)
 
     def __repr__(self):
         return self.__str__()
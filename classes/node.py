@@ -44,6 +44,9 @@ class Node:
     def get_decision(self) -> int:
         return self.__decision
 
+    def set_decision(self, decision: int | None):
+        self.__decision = decision
+
     def decide(self) -> int:
         if self.is_leaf():
             self.__decision = self.get_val()
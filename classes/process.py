@@ -1,19 +1,25 @@
-import random
+import numpy as np
+from typing import TextIO
 
-from classes.message import Message
+from classes.message import FrontierMessage, Message
+from classes.eig_index import NO_VAL
 from classes.eig_tree import EIGByzTree
+from classes.sim_random import draw_lie_mask
+from classes.tree_snapshot import take_snapshot, TreeSnapshot
 
 
 class Process:
-    def __init__(self, proc_uid: int, proc_count: int, proc_val: int, is_byz: bool = False, lie_prob: int = 50):
+    def __init__(self, proc_uid: int, proc_count: int, proc_val: int, is_byz: bool = False, lie_prob: int = 50,
+                 tree_type: type = EIGByzTree, rng: np.random.Generator = None):
         self.__proc_uid = proc_uid
         self.__proc_count = proc_count
         self.__proc_val = proc_val
         self.__byz = is_byz
-        self.__tree = EIGByzTree(self.__proc_uid, self.__proc_count, self.__proc_val)
-        self.__received_messages = []
+        self.__tree = tree_type(self.__proc_uid, self.__proc_count, self.__proc_val)
+        self.__received_messages = {}  # round number -> messages received for that round
         self.__decision = None
         self.__lie_prob = lie_prob
+        self.__rng = np.random.default_rng() if rng is None else rng  # stream the lies are drawn from
 
     def get_proc_uid(self) -> int:
         return self.__proc_uid
@@ -31,30 +37,44 @@ class Process:
         return self.__byz
 
     def receive_msg(self, msg: Message):
-        self.__received_messages.append(msg)
+        self.__received_messages.setdefault(msg.get_round_number(), []).append(msg)
 
     def receive_msgs(self, msgs: list[Message]):
         for msg in msgs:
             self.receive_msg(msg)
 
-    def apply_msgs(self):
-        for msg in self.__received_messages:
-            self.__tree.apply_msg(msg)
-
-    def generate_msg(self):
-        msg = self.__tree.get_message()
-        random.seed()
-        if self.__byz:
-            for msg_content in msg.get_content():
-                if random.randint(1, 100) <= self.__lie_prob:
-                    val = msg_content.get_val()
-                    msg_content.set_val(1 - val)  # 1 - val change zero to one and one to zero
-        return msg
+    def get_pending_rounds(self) -> list[int]:
+        return sorted(self.__received_messages, key=lambda r: -1 if r is None else r)
+
+    def apply_msgs(self, round_number: int = None):
+        # applies the messages of one round (of every pending round if round_number is None) and releases them
+        rounds = self.get_pending_rounds() if round_number is None else [round_number]
+        for r in rounds:
+            for msg in self.__received_messages.pop(r, []):
+                self.__tree.apply_msg(msg)
+
+    def generate_round_msg(self) -> FrontierMessage:
+        return self.__tree.get_message()
+
+    def generate_msg(self, round_msg: FrontierMessage = None) -> FrontierMessage:
+        # round_msg is shared by every recipient of this round, so lies are added as an overlay on a copy
+        if round_msg is None:
+            round_msg = self.generate_round_msg()
+        if not self.__byz:
+            return round_msg
+        vals = round_msg.get_vals()
+        lie_slots = np.flatnonzero(draw_lie_mask(self.__rng, len(vals), self.__lie_prob))
+        lie_slots = lie_slots[vals[lie_slots] != NO_VAL]  # only known values are flipped
+        lies = dict(zip(lie_slots.tolist(), (1 - vals[lie_slots]).tolist()))  # 1 - val swaps zero and one
+        return round_msg.replace_vals(lies)
 
     def plot_tree(self, fig_size: tuple[int, int] = (75, 10), path: str = None, node_size: int = 1200,
                   show_step_plots: bool = True):
         self.__tree.plot_tree(fig_size=fig_size, path=path, node_size=node_size, show_step_plots=show_step_plots)
 
+    def get_tree_snapshot(self) -> TreeSnapshot:
+        return take_snapshot(self.__tree)
+
     def add_tree_level(self):
         tree_height = self.__tree.get_tree_height()
         if tree_height != self.get_proc_count():
@@ -62,9 +82,12 @@ class Process:
         else:
             raise Exception(f'tree-has been completed with height: {tree_height}')
 
-    def log_tree(self):
-        return self.__tree.log()
+    def get_node_count(self) -> int:
+        return self.__tree.get_node_count()
+
+    def log_tree(self, file: TextIO = None) -> str | None:
+        return self.__tree.log(file)
 
-    def decide(self) -> int:
-        self.__decision = self.__tree.decide()
+    def decide(self, vectorized: bool = False) -> int:
+        self.__decision = self.__tree.decide(vectorized=vectorized)
         return self.__decision
@@ -0,0 +1,106 @@
+import csv
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple
+
+# Per-round, per-phase measurements of a simulation run. apply_algo(metrics=SimMetrics()) records one
+# PhaseRecord for every phase of every round (send, add_level, apply, plot) and for the phases after the
+# last round (decide and the final plot, round_number None). Without metrics apply_algo measures nothing.
+#   messages, contents, payload_bytes: messages sent in the phase, the contents they carry and their payload
+#                                      (one byte per value plus the signature bytes, see get_payload_size)
+#   sign_ops, verify_ops:              signatures made, and signatures really checked (not found in the
+#                                      verification cache), auth simulations only
+#   nodes:                             tree nodes added to all processes (values kept for sparse trees)
+# A callback gets every record as soon as its phase is done, e.g. to stream them to a log.
+
+COUNTERS = ('messages', 'contents', 'sign_ops', 'verify_ops', 'nodes', 'payload_bytes')
+
+
+class PhaseRecord(NamedTuple):
+    round_number: int | None
+    phase: str
+    seconds: float
+    messages: int
+    contents: int
+    sign_ops: int
+    verify_ops: int
+    nodes: int
+    payload_bytes: int
+
+
+class SimMetrics:
+    def __init__(self, callback: Callable[[PhaseRecord], None] = None):
+        self.__records = []
+        self.__callback = callback
+
+    @contextmanager
+    def measure(self, round_number: int | None, phase: str,
+                probe: Callable[[], dict[str, int]] = None) -> Iterator[dict[str, int]]:
+        # yields the counts of the phase for the measured code to add to. probe returns running totals
+        # (e.g. nodes of all trees), the phase is charged with their growth. probing is not timed
+        before = probe() if probe is not None else {}
+        counts = dict.fromkeys(COUNTERS, 0)
+        start = time.perf_counter()
+        yield counts
+        seconds = time.perf_counter() - start
+        if probe is not None:
+            for counter, total in probe().items():
+                counts[counter] += total - before[counter]
+        self.record(PhaseRecord(round_number, phase, seconds, **counts))
+
+    def record(self, record: PhaseRecord):
+        self.__records.append(record)
+        if self.__callback is not None:
+            self.__callback(record)
+
+    def get_records(self) -> list[PhaseRecord]:
+        return self.__records.copy()
+
+    def get_phase_totals(self) -> dict[str, dict]:
+        # seconds and counters of every phase summed over the rounds
+        totals = {}
+        for record in self.__records:
+            total = totals.setdefault(record.phase, dict.fromkeys(('seconds',) + COUNTERS, 0))
+            for field in total:
+                total[field] += getattr(record, field)
+        return totals
+
+    def get_round_totals(self) -> dict[int | None, dict]:
+        totals = {}
+        for record in self.__records:
+            total = totals.setdefault(record.round_number, dict.fromkeys(('seconds',) + COUNTERS, 0))
+            for field in total:
+                total[field] += getattr(record, field)
+        return totals
+
+    def format_table(self) -> str:
+        lines = [f'{"round":>6} {"phase":<10}{"seconds":>10}{"messages":>10}{"contents":>10}{"signs":>9}'
+                 f'{"verifies":>10}{"nodes":>9}{"payload B":>12}']
+        for r in self.__records:
+            lines.append(f'{"-" if r.round_number is None else r.round_number:>6} {r.phase:<10}{r.seconds:>10.4f}'
+                         f'{r.messages:>10}{r.contents:>10}{r.sign_ops:>9}{r.verify_ops:>10}{r.nodes:>9}'
+                         f'{r.payload_bytes:>12}')
+        return '\n'.join(lines)
+
+    def write_csv(self, path: str):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(PhaseRecord._fields)
+            writer.writerows(self.__records)
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump([record._asdict() for record in self.__records], f, indent=1)
+
+
+def count_messages(counts: dict[str, int], msgs: list, sizes: dict[int, tuple[int, int]]):
+    # adds messages sent in a phase to its counts. sizes keeps (contents, payload bytes) by message id, so a
+    # message shared by many recipients is only sized once; the caller keeps the messages alive meanwhile
+    counts['messages'] += len(msgs)
+    for msg in msgs:
+        size = sizes.get(id(msg))
+        if size is None:
+            size = sizes[id(msg)] = (msg.get_content_count(), msg.get_payload_size())
+        counts['contents'] += size[0]
+        counts['payload_bytes'] += size[1]
@@ -0,0 +1,25 @@
+import numpy as np
+
+# Every random choice of a simulation comes from one seed. Its seed sequence is split into a stream for the
+# setup (byzantine processes, initial values) and one stream per process for the lies it tells, so a
+# process draws the same lies whatever the other processes do, and EIGByzSim, AuthEIGByzSim and
+# BatchedEIGByzSim make the same choices for the same seed. A seed of None takes fresh OS entropy once per
+# simulation. A seed can also be a list of ints, e.g. (base seed, scenario parameters, repetition).
+
+
+def spawn_rngs(seed: int | list[int] | None, proc_count: int) -> tuple[np.random.Generator, list[np.random.Generator]]:
+    setup, *procs = np.random.SeedSequence(seed).spawn(proc_count + 1)
+    return np.random.default_rng(setup), [np.random.default_rng(proc) for proc in procs]
+
+
+def draw_byz_proc_uids(rng: np.random.Generator, proc_count: int, byz_proc_count: int) -> list[int]:
+    return (rng.permutation(proc_count)[:byz_proc_count] + 1).tolist()
+
+
+def draw_initial_vals(rng: np.random.Generator, proc_count: int) -> list[int]:
+    return rng.integers(0, 2, size=proc_count).tolist()
+
+
+def draw_lie_mask(rng: np.random.Generator, size: int, lie_prob: int) -> np.ndarray:
+    # one draw for a whole message, True for the slots the sender lies about (lie_prob percent of them)
+    return rng.integers(1, 101, size=size) <= lie_prob
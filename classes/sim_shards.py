@@ -0,0 +1,134 @@
+import math
+import multiprocessing
+
+from classes.tree_snapshot import TreeSnapshot
+
+# apply_algo runs every phase of a round as a command on shards of its processes. LocalShards runs the commands
+# on the processes themselves. ProcessShards (apply_algo(workers=...)) gives every worker process a shard of the
+# processes once, when the run starts, and the worker keeps them with their trees until the run ends: per round
+# only the messages of the round and the small results of the commands cross the pipes, and the processes are
+# sent back once at the end. A command is a function of the processes of one shard, in uid order, that returns
+# a list (one result per process, or nothing); run returns the lists of all shards joined in uid order.
+
+
+def generate_msgs(processes: list, proc_count: int) -> list[list]:
+    # the message of every process to each of the receivers 1..proc_count. every process draws its lies from
+    # its own stream, so they do not depend on how the processes are sharded
+    msgs = []
+    for p in processes:
+        round_msg = p.generate_round_msg()
+        msgs.append([p.generate_msg(round_msg) for _ in range(proc_count)])
+    return msgs
+
+
+def receive_msgs(processes: list, inboxes: list[list]):
+    for p, msgs in zip(processes, inboxes):
+        p.receive_msgs(msgs)
+
+
+def add_tree_level(processes: list):
+    for p in processes:
+        p.add_tree_level()
+
+
+def apply_msgs(processes: list, round_number: int):
+    for p in processes:
+        p.apply_msgs(round_number)
+
+
+def decide(processes: list, vectorized: bool) -> list[int]:
+    return [p.decide(vectorized=vectorized) for p in processes]
+
+
+def get_tree_snapshots(processes: list) -> list[TreeSnapshot]:
+    return [p.get_tree_snapshot() for p in processes]
+
+
+def get_node_counts(processes: list) -> list[int]:
+    return [p.get_node_count() for p in processes]
+
+
+class LocalShards:
+    def __init__(self, processes: list):
+        self.__processes = processes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, command, *args, per_process: list = None) -> list:
+        # per_process has one item for every process, the command gets the items of its shard as last argument
+        if per_process is not None:
+            args += (per_process,)
+        return command(self.__processes, *args) or []
+
+
+def serve(conn, processes: list):
+    # loop of a worker: runs every command it gets on its processes, sends them back when it gets None
+    while True:
+        command, args = conn.recv()
+        if command is None:
+            conn.send(processes)
+            return
+        try:
+            conn.send((command(processes, *args), None))
+        except Exception as e:
+            conn.send((None, e))
+
+
+class ProcessShards:
+    def __init__(self, processes: list, workers: int):
+        self.__processes = processes
+        size = math.ceil(len(processes) / workers)
+        self.__bounds = [(start, min(start + size, len(processes))) for start in range(0, len(processes), size)]
+        self.__conns = []
+        self.__workers = []
+        for start, end in self.__bounds:
+            conn, worker_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=serve, args=(worker_conn, processes[start:end]), daemon=True)
+            worker.start()
+            self.__conns.append(conn)
+            self.__workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+        return False
+
+    def run(self, command, *args, per_process: list = None) -> list:
+        # per_process has one item for every process, the command gets the items of its shard as last argument
+        for conn, (start, end) in zip(self.__conns, self.__bounds):
+            conn.send((command, args if per_process is None else args + (per_process[start:end],)))
+        results, errors = [], []
+        for conn in self.__conns:
+            res, error = conn.recv()
+            if error is not None:
+                errors.append(error)
+            elif res is not None:
+                results += res
+        if len(errors) > 0:
+            raise errors[0]
+        return results
+
+    def close(self):
+        # the processes come back with the state the run left them in, it is copied into the objects given
+        # to the constructor so that references to them stay valid
+        for conn in self.__conns:
+            conn.send((None, ()))
+        for conn, (start, end) in zip(self.__conns, self.__bounds):
+            for p, worker_p in zip(self.__processes[start:end], conn.recv()):
+                vars(p).update(vars(worker_p))
+        for worker in self.__workers:
+            worker.join()
+
+    def terminate(self):
+        for worker in self.__workers:
+            worker.terminate()
+            worker.join()
@@ -0,0 +1,197 @@
+import numpy as np
+from typing import TextIO, TYPE_CHECKING
+
+from classes.eig_index import get_append_slots, get_fan_out, get_level_paths, get_level_size, rank_path, NO_VAL
+from classes.message import FrontierMessage, Message
+from classes.tree_export import to_networkx, write_log
+from classes.tree_render import plot_tree
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+# Same interface as EIGByzTree, but nothing is allocated per slot. add_level only raises the height, and a
+# node inherits the value of its parent unless it holds another one: only those values are kept, in one
+# dict per level keyed by path (the proc uids without the -1 root marker, the root is () and always kept).
+# Honest processes relay what they received, so in a simulation a node differs from its parent only where
+# a byzantine process lied, whatever the initial values. Decisions are sparse the same way: a subtree
+# without kept values holds the value of its root everywhere and decides like it (get_uniform_decision),
+# so decide only visits the prefixes of kept paths. Values are expected level by level, as in a
+# simulation (setting a value later changes what its descendants inherit); with every leaf reported,
+# decisions are the ones of EIGByzTree and ArrayEIGByzTree.
+class SparseEIGByzTree:
+    def __init__(self, proc_uid: int, proc_count: int, proc_val: int):
+        self.__proc_uid = proc_uid
+        self.__proc_count = proc_count
+        self.__vals = [{(): proc_val}]  # values of every level that differ from the parent value
+        self.__dense = {}  # level -> get_level_vals, until a value of the level or above it changes
+        self.__decisions = None  # one dict per level after decide, path -> decision
+        self.__decision = None
+
+    def get_proc_uid(self) -> int:
+        return self.__proc_uid
+
+    def get_proc_count(self) -> int:
+        return self.__proc_count
+
+    def get_decision(self) -> int:
+        return self.__decision
+
+    def get_tree_height(self) -> int:
+        return len(self.__vals) - 1
+
+    def get_level_size(self, level: int) -> int:
+        return get_level_size(self.__proc_count, level)
+
+    def get_node_count(self) -> int:
+        # the values that are kept, the tree has get_level_size(level) nodes on every level
+        return sum(len(level_vals) for level_vals in self.__vals)
+
+    def add_level(self):
+        self.__vals.append({})
+        self.__decisions = None
+
+    def __get_kept_val(self, path: tuple[int, ...]) -> int:
+        # value of the nearest kept prefix of path, the root is always kept
+        for level in range(min(len(path), self.get_tree_height()), -1, -1):
+            val = self.__vals[level].get(path[:level])
+            if val is not None:
+                return val
+
+    def get_val(self, path: tuple[int, ...]) -> int | None:
+        val = self.__get_kept_val(tuple(path))
+        return None if val == NO_VAL else val
+
+    def __set_val(self, path: tuple[int, ...], val: int):
+        level = len(path)
+        if level > 0 and val == self.__get_kept_val(path[:-1]):
+            self.__vals[level].pop(path, None)
+        else:
+            self.__vals[level][path] = val
+        self.__clear_dense(level)
+
+    def __clear_dense(self, level: int):
+        for cached in [cached for cached in self.__dense if cached >= level]:
+            del self.__dense[cached]
+
+    def get_level_vals(self, level: int) -> np.ndarray:
+        vals = self.__dense.get(level)
+        if vals is None:
+            if level == 0:
+                vals = np.array([self.__vals[0][()]], dtype=np.int8)
+            else:
+                vals = np.repeat(self.get_level_vals(level - 1), get_fan_out(self.__proc_count, level))
+            for path, val in self.__vals[level].items():
+                vals[rank_path(self.__proc_count, path)] = val
+            self.__dense[level] = vals
+        return vals.copy()
+
+    def get_uniform_decision(self, val: int, level: int) -> int:
+        # decision of a node of level whose whole subtree holds val
+        decision = val
+        for lvl in range(self.get_tree_height(), level, -1):
+            fan_out = get_fan_out(self.__proc_count, lvl)
+            decision = 1 if fan_out * decision > fan_out // 2 else 0
+        return decision
+
+    def get_level_decisions(self, level: int) -> np.ndarray:
+        if self.__decisions is None:
+            return np.full(self.get_level_size(level), NO_VAL, dtype=np.int8)
+        vals = self.get_level_vals(level)
+        decisions = np.empty_like(vals)
+        for val in np.unique(vals).tolist():
+            decisions[vals == val] = self.get_uniform_decision(val, level)
+        for path, decision in self.__decisions[level].items():
+            decisions[rank_path(self.__proc_count, path)] = decision
+        return decisions
+
+    def __node_str(self, level: int, slot: int) -> str:
+        path = tuple(get_level_paths(self.__proc_count, level)[slot].tolist())
+        if level == self.get_tree_height():
+            return f"path: {''.join(str(p) for p in path)}, val: {self.get_val(path)}"
+        return f"path: {''.join(str(p) for p in path)}"
+
+    def log(self, file: TextIO = None) -> str | None:
+        return write_log(self, self.__node_str, file)
+
+    def __str__(self):
+        return self.log()
+
+    def __repr__(self):
+        return self.__str__()
+
+    def convert_to_networkx_graph(self, id_type: str = 'int') -> 'nx.Graph':
+        return to_networkx(self, id_type)
+
+    def get_decision_colors(self) -> list[str]:
+        res = []
+        for level in range(self.get_tree_height() + 1):
+            for decision in self.get_level_decisions(level).tolist():
+                match decision:
+                    case 1:
+                        color = 'lawngreen'
+                    case 0:
+                        color = 'crimson'
+                    case _:
+                        color = 'deepskyblue'
+                res.append(color)
+        return res
+
+    def plot_tree(self, fig_size: tuple[int, int] = (75, 10), path: str = None, node_size: int = 1200,
+                  show_step_plots: bool = True):
+        plot_tree(self, fig_size=fig_size, path=path, node_size=node_size, show_step_plots=show_step_plots)
+
+    def get_message(self) -> FrontierMessage:
+        height = self.get_tree_height()
+        return FrontierMessage(self.get_level_vals(height), sender=self.get_proc_uid(), proc_count=self.__proc_count,
+                               level=height)
+
+    def apply_msg(self, msg: Message | FrontierMessage):
+        if isinstance(msg, FrontierMessage):
+            self.__apply_frontier_msg(msg)
+            return
+        sender = (msg.get_sender(),)
+        for msg_content in msg.get_content_view():
+            path = msg_content.get_path()[1:] + sender
+            if len(path) <= self.get_tree_height() and rank_path(self.__proc_count, path) is not None:
+                val = msg_content.get_val()
+                self.__set_val(path, NO_VAL if val is None else val)
+
+    def __apply_frontier_msg(self, msg: FrontierMessage):
+        level = msg.get_level()
+        if level + 1 > self.get_tree_height():
+            return
+        # slot i of the message is the child of slot i of level that the sender appends, so it inherits the
+        # value of that slot. every sender writes its own slots once, so only the values that differ are kept
+        # and the rest of the message is never turned into paths
+        slots = get_append_slots(self.__proc_count, level, msg.get_sender())
+        vals = msg.get_vals()
+        indexes = np.flatnonzero((slots >= 0) & (vals != self.get_level_vals(level)))
+        paths = get_level_paths(self.__proc_count, level)[indexes].tolist()
+        sender = (msg.get_sender(),)
+        kept = self.__vals[level + 1]
+        for path, val in zip(paths, vals[indexes].tolist()):
+            kept[tuple(path) + sender] = val
+        self.__clear_dense(level + 1)
+
+    def decide(self, vectorized: bool = False):
+        # majority of every kept prefix, level by level from the leaves. a child that is neither kept nor
+        # the prefix of a kept path holds the value of its parent in its whole subtree. there are no nodes to
+        # recurse over, vectorized is taken for the same signature as the node trees and changes nothing
+        height = self.get_tree_height()
+        decisions = [None] * (height + 1)
+        decisions[height] = dict(self.__vals[height])
+        for level in range(height, 0, -1):
+            fan_out = get_fan_out(self.__proc_count, level)
+            sums, counts = {}, {}
+            for path, decision in decisions[level].items():
+                sums[path[:-1]] = sums.get(path[:-1], 0) + decision
+                counts[path[:-1]] = counts.get(path[:-1], 0) + 1
+            decisions[level - 1] = {}
+            for parent in sums.keys() | self.__vals[level - 1].keys():
+                missing = self.get_uniform_decision(self.__get_kept_val(parent), level)
+                summation = sums.get(parent, 0) + (fan_out - counts.get(parent, 0)) * missing
+                decisions[level - 1][parent] = 1 if summation > fan_out // 2 else 0
+        self.__decisions = decisions
+        self.__decision = decisions[0][()]
+        return self.__decision
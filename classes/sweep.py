@@ -0,0 +1,185 @@
+"""
+Parameter sweep over EIGByz simulations. Every scenario (process count, byzantine count, rounds, lie
+probability) is simulated `repetitions` times with plotting disabled, scenarios run in parallel on a process
+pool and every finished scenario is appended as one row to a CSV file. Scenarios that already have a row in
+the file are skipped, so an interrupted sweep continues where it stopped when it is started again. Rows also
+record the seed and, for the auth engine, the signature backend, and a row only counts for a sweep with the same
+ones.
+
+run from the repository root, e.g.:
+    python -m classes.sweep --procs 4-7 --byz 1-2 --lie-probs 50,100 --repetitions 20 --output sweep.csv
+"""
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+ENGINES = ('object', 'array', 'sparse', 'batched', 'auth')
+RESULT_FIELDS = ['engine', 'proc_count', 'byz_proc_count', 'step_number', 'byz_prob', 'repetitions', 'signer',
+                 'seed', 'agreement_rate', 'validity_rate', 'termination_rate', 'success_rate', 'mean_time', 'max_time',
+                 'total_time']
+SCENARIO_FIELDS = RESULT_FIELDS[:8]
+
+
+def create_sim(engine: str, proc_count: int, byz_proc_count: int, byz_prob: int, signer: str = 'cryptidy',
+               seed: int | list[int] = None):
+    match engine:
+        case 'object':
+            from classes.eig_sim import EIGByzSim
+            return EIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, seed=seed)
+        case 'array':
+            from classes.array_eig_tree import ArrayEIGByzTree
+            from classes.eig_sim import EIGByzSim
+            return EIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, tree_type=ArrayEIGByzTree, seed=seed)
+        case 'sparse':
+            from classes.eig_sim import EIGByzSim
+            from classes.sparse_eig_tree import SparseEIGByzTree
+            return EIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, tree_type=SparseEIGByzTree,
+                             seed=seed)
+        case 'batched':
+            from classes.batched_eig_sim import BatchedEIGByzSim
+            return BatchedEIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, seed=seed)
+        case 'auth':
+            from classes.Auth.auth_eig_sim import AuthEIGByzSim
+            from classes.Auth.signer import get_signer
+            return AuthEIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, signer=get_signer(signer),
+                                 seed=seed)
+    raise ValueError(f'unknown engine {engine}, expected one of {ENGINES}')
+
+
+def run_sim(sim, engine: str, step_number: int):
+    if engine == 'batched':
+        return sim.apply_algo(step_number=step_number)
+    return sim.apply_algo(save_step_plot=False, save_decision_plot=False, step_number=step_number)
+
+
+def get_scenario_signer(engine: str, signer: str) -> str | None:
+    # only the auth engine signs, the scenarios of the other engines have no signer whatever --signer is
+    return signer if engine == 'auth' else None
+
+
+def run_scenario(engine: str, proc_count: int, byz_proc_count: int, step_number: int, byz_prob: int,
+                 repetitions: int, signer: str = 'cryptidy', seed: int = None) -> dict:
+    # with a seed, repetition r of a scenario is seeded by (seed, scenario, r) whatever the engine, so two
+    # engines (or two versions of one) simulate exactly the same runs
+    agreement = validity = termination = success = 0
+    times = []
+    for repetition in range(repetitions):
+        run_seed = None if seed is None else [seed, proc_count, byz_proc_count, step_number, byz_prob, repetition]
+        sim = create_sim(engine, proc_count, byz_proc_count, byz_prob, signer, run_seed)
+        start = time.perf_counter()
+        run_sim(sim, engine, step_number)
+        times.append(time.perf_counter() - start)
+        agreement += sim.check_agreement()
+        validity += sim.check_validity()
+        termination += sim.check_termination()
+        success += sim.check_requirements() == '-'
+    return {'engine': engine, 'proc_count': proc_count, 'byz_proc_count': byz_proc_count,
+            'step_number': step_number, 'byz_prob': byz_prob, 'repetitions': repetitions,
+            'signer': get_scenario_signer(engine, signer) or '', 'seed': '' if seed is None else seed,
+            'agreement_rate': agreement / repetitions, 'validity_rate': validity / repetitions,
+            'termination_rate': termination / repetitions, 'success_rate': success / repetitions,
+            'mean_time': sum(times) / repetitions, 'max_time': max(times), 'total_time': sum(times)}
+
+
+def is_valid_scenario(proc_count: int, byz_proc_count: int, step_number: int = None) -> bool:
+    # at most proc_count byzantine processes and 1 to proc_count rounds, a tree has at most proc_count levels.
+    # step_number None is the default of the simulations, byz_proc_count + 1 rounds
+    if step_number is None:
+        step_number = byz_proc_count + 1
+    return 0 <= byz_proc_count <= proc_count and 0 < step_number <= proc_count
+
+
+def get_scenarios(engine: str, proc_counts: list[int], byz_proc_counts: list[int], step_numbers: list[int] | None,
+                  byz_probs: list[int], repetitions: int, signer: str = 'cryptidy', seed: int = None) -> list[tuple]:
+    # step_numbers None means f + 1 rounds. scenarios that can not be simulated are left out. the signer (auth
+    # only) and the seed are part of every scenario, so runs with another backend or seed are not taken for
+    # finished ones
+    signer = get_scenario_signer(engine, signer)
+    scenarios = []
+    for proc_count, byz_proc_count, byz_prob in product(proc_counts, byz_proc_counts, byz_probs):
+        for step_number in [byz_proc_count + 1] if step_numbers is None else step_numbers:
+            if is_valid_scenario(proc_count, byz_proc_count, step_number):
+                scenarios.append((engine, proc_count, byz_proc_count, step_number, byz_prob, repetitions, signer,
+                                  seed))
+    return scenarios
+
+
+def scenario_key(row: dict) -> tuple:
+    # a row read back from the file has '' where the scenario has no signer or seed
+    return tuple('' if row[field] is None else str(row[field]) for field in SCENARIO_FIELDS)
+
+
+def read_finished_scenarios(output_path: str) -> set[tuple]:
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return set()
+    with open(output_path, newline='') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != RESULT_FIELDS:
+            raise ValueError(f'{output_path} has the columns {reader.fieldnames}, expected {RESULT_FIELDS}; '
+                             f'write the sweep to another file')
+        return {scenario_key(row) for row in reader}
+
+
+def run_sweep(proc_counts: list[int], byz_proc_counts: list[int], step_numbers: list[int] = None,
+              byz_probs: list[int] = None, repetitions: int = 10, output_path: str = 'sweep.csv',
+              engine: str = 'object', workers: int = None, signer: str = 'cryptidy', seed: int = None) -> list[dict]:
+    if engine not in ENGINES:
+        raise ValueError(f'unknown engine {engine}, expected one of {ENGINES}')
+    if byz_probs is None:
+        byz_probs = [50]
+    scenarios = get_scenarios(engine, proc_counts, byz_proc_counts, step_numbers, byz_probs, repetitions, signer,
+                              seed)
+    finished = read_finished_scenarios(output_path)
+    scenarios = [s for s in scenarios if scenario_key(dict(zip(SCENARIO_FIELDS, s))) not in finished]
+    new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+    rows = []
+    with open(output_path, 'a', newline='') as f, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new_file:
+            writer.writeheader()
+        futures = [executor.submit(run_scenario, *scenario) for scenario in scenarios]
+        for future in as_completed(futures):
+            row = future.result()
+            writer.writerow(row)
+            f.flush()  # every finished scenario is on disk, so an interrupted sweep can be resumed
+            rows.append(row)
+    return rows
+
+
+def parse_int_list(arg: str) -> list[int]:
+    # accepts '4', '4,6,8', '4-7' and combinations such as '4-7,10'
+    res = []
+    for part in arg.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            res += list(range(int(start), int(end) + 1))
+        else:
+            res.append(int(part))
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description='run EIGByz simulations over a grid of parameters')
+    parser.add_argument('--procs', type=parse_int_list, required=True, help='process counts, e.g. 4-7')
+    parser.add_argument('--byz', type=parse_int_list, required=True, help='byzantine process counts, e.g. 0-2')
+    parser.add_argument('--rounds', type=parse_int_list, default=None, help='round counts, default f + 1')
+    parser.add_argument('--lie-probs', type=parse_int_list, default=[50], help='byzantine lie probabilities')
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--engine', choices=ENGINES, default='object')
+    parser.add_argument('--signer', choices=['cryptidy', 'ed25519', 'hmac'], default='cryptidy',
+                        help='signature backend of the auth engine')
+    parser.add_argument('--workers', type=int, default=None, help='parallel scenarios, default all cores')
+    parser.add_argument('--output', default='sweep.csv')
+    parser.add_argument('--seed', type=int, default=None, help='makes every run reproducible')
+    args = parser.parse_args()
+    rows = run_sweep(args.procs, args.byz, args.rounds, args.lie_probs, args.repetitions, args.output, args.engine,
+                     args.workers, args.signer, args.seed)
+    print(f'{len(rows)} scenarios written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import io
+import json
+import numpy as np
+from typing import Callable, Iterator, TextIO, TYPE_CHECKING
+from xml.sax.saxutils import quoteattr
+
+from classes.eig_index import get_level_paths, get_level_size, get_level_slots
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+# Structural export of EIG trees. The structure of a tree is implied by its process count and height
+# (classes/eig_index.py), so edges are produced level by level from the cached parent index of every slot
+# instead of walking nodes and rebuilding ids from path strings. Node ids are either
+#   'int':   the index of the node in breadth-first (level, slot) order, the root is 0
+#   'tuple': the path of the node without the -1 root marker, the root is ()
+# Labels are the path digits as they are plotted ('-1' for the root); with 10 or more processes the uids
+# are separated by dots, so uid 10 and the path 1, 0 can not collide.
+#
+# Exports that take a tree also write the val and decision of every node (classes/eig_decide.py encoding:
+# -1 stands for None, -2 for an unauthenticated node). The tree needs get_proc_count, get_tree_height,
+# get_level_vals and get_level_decisions (EIGByzTree, ArrayEIGByzTree and AuthEIGByzTree have them).
+
+ID_TYPES = ('int', 'tuple')
+
+
+def get_level_offsets(proc_count: int, height: int) -> np.ndarray:
+    # offsets[level] is the int id of the first node of level, offsets[height + 1] the node count
+    sizes = [get_level_size(proc_count, level) for level in range(height + 1)]
+    return np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+
+
+def get_edge_array(proc_count: int, height: int) -> np.ndarray:
+    # one (parent id, child id) row per edge with int ids, in breadth-first order of the children
+    offsets = get_level_offsets(proc_count, height)
+    edges = np.empty((offsets[-1] - 1, 2), dtype=np.int64)
+    for level in range(1, height + 1):
+        rows = slice(offsets[level] - 1, offsets[level + 1] - 1)
+        edges[rows, 0] = get_level_slots(proc_count, level)[0] + offsets[level - 1]
+        edges[rows, 1] = np.arange(offsets[level], offsets[level + 1])
+    return edges
+
+
+def get_level_node_ids(proc_count: int, level: int, id_type: str = 'int') -> list:
+    if id_type == 'int':
+        offset = get_level_offsets(proc_count, level)[level]
+        return list(range(offset, offset + get_level_size(proc_count, level)))
+    if id_type == 'tuple':
+        return [tuple(path) for path in get_level_paths(proc_count, level).tolist()]
+    raise ValueError(f'unknown id type {id_type}, expected one of {ID_TYPES}')
+
+
+def iter_edges(proc_count: int, height: int, id_type: str = 'int') -> Iterator[tuple]:
+    # streams (parent id, child id) level by level, only one level of ids is in memory at a time
+    parent_ids = get_level_node_ids(proc_count, 0, id_type)
+    for level in range(1, height + 1):
+        child_ids = get_level_node_ids(proc_count, level, id_type)
+        parents = get_level_slots(proc_count, level)[0].tolist()
+        for parent, child_id in zip(parents, child_ids):
+            yield parent_ids[parent], child_id
+        parent_ids = child_ids
+
+
+def get_level_labels(proc_count: int, level: int) -> list[str]:
+    if level == 0:
+        return ['-1']
+    sep = '' if proc_count < 10 else '.'
+    return [sep.join(str(p) for p in path) for path in get_level_paths(proc_count, level).tolist()]
+
+
+def get_node_labels(proc_count: int, height: int) -> list[str]:
+    labels = []
+    for level in range(height + 1):
+        labels += get_level_labels(proc_count, level)
+    return labels
+
+
+def iter_nodes(tree, id_type: str = 'int') -> Iterator[tuple]:
+    # streams (id, label, val, decision) of every node in breadth-first order
+    proc_count = tree.get_proc_count()
+    for level in range(tree.get_tree_height() + 1):
+        yield from zip(get_level_node_ids(proc_count, level, id_type), get_level_labels(proc_count, level),
+                       tree.get_level_vals(level).tolist(), tree.get_level_decisions(level).tolist())
+
+
+def write_log(tree, node_str: Callable[[int, int], str], file: TextIO = None) -> str | None:
+    # log() of every tree class: the root line, then a line with node_str(level, slot) of every node of each
+    # level. writes the log to file if one is given, else returns it as a string
+    out = io.StringIO() if file is None else file
+    out.write('root: -1')
+    if tree.get_tree_height() == 0:
+        out.write(f' val: {tree.get_level_vals(0).tolist()[0]}')
+    for level in range(1, tree.get_tree_height() + 1):
+        out.write('\n')
+        for slot in range(get_level_size(tree.get_proc_count(), level)):
+            out.write(node_str(level, slot) + ' ** ')
+    return out.getvalue() if file is None else None
+
+
+def to_networkx(tree, id_type: str = 'int') -> 'nx.Graph':
+    # nodes are added in breadth-first order, so graph.nodes matches get_decision_colors
+    import networkx as nx
+    graph = nx.Graph()
+    graph.add_nodes_from((node_id, {'label': label, 'val': val, 'decision': decision})
+                         for node_id, label, val, decision in iter_nodes(tree, id_type))
+    graph.add_edges_from(iter_edges(tree.get_proc_count(), tree.get_tree_height(), id_type))
+    return graph
+
+
+def write_json(tree, path: str, id_type: str = 'int'):
+    # node-link json (networkx.node_link_graph reads it back), written node by node
+    with open(path, 'w') as f:
+        f.write('{"directed": false, "multigraph": false, "graph": ')
+        json.dump({'proc_uid': tree.get_proc_uid(), 'proc_count': tree.get_proc_count(),
+                   'height': tree.get_tree_height()}, f)
+        f.write(', "nodes": [')
+        for i, (node_id, label, val, decision) in enumerate(iter_nodes(tree, id_type)):
+            f.write(', ' if i > 0 else '')
+            json.dump({'id': node_id, 'label': label, 'val': val, 'decision': decision}, f)
+        f.write('], "links": [')
+        for i, (source, target) in enumerate(iter_edges(tree.get_proc_count(), tree.get_tree_height(), id_type)):
+            f.write(', ' if i > 0 else '')
+            json.dump({'source': source, 'target': target}, f)
+        f.write(']}\n')
+
+
+def write_graphml(tree, path: str):
+    # graphml with the int id of every node, written line by line
+    def node_ref(node_id: int) -> str:
+        return quoteattr(f'n{node_id}')
+
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                '<key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+                '<key id="val" for="node" attr.name="val" attr.type="int"/>\n'
+                '<key id="decision" for="node" attr.name="decision" attr.type="int"/>\n'
+                '<graph edgedefault="undirected">\n')
+        for node_id, label, val, decision in iter_nodes(tree, 'int'):
+            f.write(f'<node id={node_ref(node_id)}><data key="label">{label}</data><data key="val">{val}</data>'
+                    f'<data key="decision">{decision}</data></node>\n')
+        for source, target in iter_edges(tree.get_proc_count(), tree.get_tree_height(), 'int'):
+            f.write(f'<edge source={node_ref(source)} target={node_ref(target)}/>\n')
+        f.write('</graph>\n</graphml>\n')
@@ -0,0 +1,66 @@
+import numpy as np
+
+from classes.eig_index import get_level_slots
+
+# Same layout as external/plot_tree.hierarchy_pos with its default arguments, computed level by level from
+# the parent index of every node instead of by recursion over a networkx graph. Nodes of a level are
+# ordered by parent (as the slots of classes/eig_index.py are), so the children of a node are a contiguous
+# block of the next level and every step below is a handful of numpy operations over a whole level.
+#   top down:  a node gets an equal share of the horizontal space of its parent and sits in its middle
+#   bottom up: leaves are spread evenly in depth-first order, a parent sits between its outermost children
+# the final x is a mix of both (leaf_vs_root_factor) scaled so the largest x is width.
+
+
+def hierarchy_pos_levels(level_parents: list[np.ndarray], width: float = 1., vert_gap: float = 0.2,
+                         vert_loc: float = 0, leaf_vs_root_factor: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+    # level_parents[i] holds the parent index (in level i) of every node of level i + 1, non-decreasing.
+    # returns x and y of all nodes, level by level starting with the root
+    level_sizes = [1] + [len(parents) for parents in level_parents]
+    child_counts = [np.bincount(parents, minlength=size) for parents, size in zip(level_parents, level_sizes)]
+    child_counts.append(np.zeros(level_sizes[-1], dtype=np.int64))
+    first_child = [np.cumsum(counts) - counts for counts in child_counts]
+
+    # top down: left edge and width of the space of every node
+    lefts, widths = [np.zeros(1)], [np.full(1, float(width))]
+    for level, parents in enumerate(level_parents, start=1):
+        rank = np.arange(level_sizes[level]) - first_child[level - 1][parents]
+        node_widths = widths[-1][parents] / child_counts[level - 1][parents]
+        lefts.append(lefts[-1][parents] + rank * node_widths)
+        widths.append(node_widths)
+
+    # leaves below every node, then the depth-first index of the first leaf below every node
+    leaf_counts = [None] * len(level_sizes)
+    leaf_counts[-1] = np.ones(level_sizes[-1], dtype=np.int64)
+    for level in range(len(level_sizes) - 2, -1, -1):
+        below = np.bincount(level_parents[level], weights=leaf_counts[level + 1], minlength=level_sizes[level])
+        leaf_counts[level] = np.where(child_counts[level] == 0, 1, below.astype(np.int64))
+    leaf_offsets = [np.zeros(1, dtype=np.int64)]
+    for level, parents in enumerate(level_parents, start=1):
+        before = np.cumsum(leaf_counts[level]) - leaf_counts[level]  # leaves before the node in its level
+        leaf_offsets.append(leaf_offsets[-1][parents] + before - before[first_child[level - 1][parents]])
+
+    # bottom up: leaves at their offset, parents between their first and last child
+    leaf_dx = width / max(int(leaf_counts[0][0]), 1)
+    leaf_xs = [None] * len(level_sizes)
+    for level in range(len(level_sizes) - 1, -1, -1):
+        xs = leaf_offsets[level] * leaf_dx
+        if level + 1 < len(level_sizes):
+            has_children = child_counts[level] > 0
+            first = first_child[level][has_children]
+            last = first + child_counts[level][has_children] - 1
+            xs[has_children] = (leaf_xs[level + 1][first] + leaf_xs[level + 1][last]) / 2
+        leaf_xs[level] = xs
+
+    root_xs = np.concatenate([left + node_width / 2 for left, node_width in zip(lefts, widths)])
+    x = leaf_vs_root_factor * np.concatenate(leaf_xs) + (1 - leaf_vs_root_factor) * root_xs
+    x *= width / x.max()
+    y = np.concatenate([np.full(size, vert_loc - level * vert_gap) for level, size in enumerate(level_sizes)])
+    return x, y
+
+
+def eig_hierarchy_pos(proc_count: int, height: int, width: float = 1., vert_gap: float = 0.2, vert_loc: float = 0,
+                      leaf_vs_root_factor: float = 0.5) -> tuple[np.ndarray, np.ndarray]:
+    # positions of the full EIG tree of proc_count processes and the given height, in slot order
+    level_parents = [get_level_slots(proc_count, level)[0] for level in range(1, height + 1)]
+    return hierarchy_pos_levels(level_parents, width, vert_gap, vert_loc, leaf_vs_root_factor)
+
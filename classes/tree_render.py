@@ -0,0 +1,149 @@
+"""
+Renders tree snapshots recorded by a headless simulation run (apply_algo(headless=True)) into the same PNG
+files the simulation would have plotted. Plots are drawn in parallel on a process pool and only the ones
+that are asked for, so a run can be simulated first and looked at later. The layout of a tree shape is
+computed once and reused, and figures are drawn with the object-oriented matplotlib API, not pyplot.
+
+run from the repository root, e.g.:
+    python -m classes.tree_render results/proc-4-byz-1-r-2/ --only 'final-decision/*' --workers 4
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from functools import lru_cache
+
+from classes.tree_export import get_edge_array, get_level_offsets, get_node_labels
+from classes.tree_layout import eig_hierarchy_pos
+from classes.tree_snapshot import load_snapshots, TreeSnapshot
+
+
+@lru_cache(maxsize=64)
+def get_layout(proc_count: int, height: int) -> tuple:
+    # every tree with the same process count and height has the same shape, so the graph (int node ids,
+    # classes/tree_export.py), its positions and labels are computed once per shape in every process and
+    # reused by all plots after that
+    import networkx as nx
+    graph = nx.Graph()
+    graph.add_nodes_from(range(get_level_offsets(proc_count, height)[-1]))
+    graph.add_edges_from(get_edge_array(proc_count, height).tolist())
+    if height == 0:
+        pos = nx.spring_layout(graph)
+    else:
+        x, y = eig_hierarchy_pos(proc_count, height)
+        pos = dict(enumerate(zip(x.tolist(), y.tolist())))
+    labels = dict(enumerate(get_node_labels(proc_count, height)))
+    return graph, pos, labels
+
+
+def render_snapshot(snapshot: TreeSnapshot, path: str, fig_size: tuple[int, int] = (15, 5), node_size: int = None):
+    # uses a Figure of its own instead of the pyplot global state, so plots can be drawn side by side
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import networkx as nx
+    if node_size is None:
+        node_size = 1000 + snapshot.get_proc_count() * 100
+    graph, pos, labels = get_layout(snapshot.get_proc_count(), snapshot.get_tree_height())
+    fig = Figure(figsize=fig_size)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title(f'process {snapshot.get_proc_uid()} tree plot')
+    nx.draw_networkx(graph, pos=pos, ax=ax, labels=labels, with_labels=True,
+                     node_size=[node_size] * graph.number_of_nodes(), node_color=snapshot.get_colors())
+    ax.set_axis_off()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fig.savefig(path)
+    return path
+
+
+def plot_tree(tree, fig_size: tuple[int, int] = (75, 10), path: str = None, node_size: int = 1200,
+              show_step_plots: bool = True):
+    # plot_tree of every tree class: draws a live tree on a pyplot figure, which is left open to be shown
+    # unless show_step_plots is False. imported here so simulations that do not plot never load them
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    graph, pos, labels = get_layout(tree.get_proc_count(), tree.get_tree_height())
+    plt.figure(figsize=fig_size)
+    plt.title(f'process {tree.get_proc_uid()} tree plot')
+    nx.draw(graph, pos=pos, labels=labels, with_labels=True, node_size=[node_size] * graph.number_of_nodes(),
+            node_color=tree.get_decision_colors())
+    if path is not None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        plt.savefig(path)
+    if not show_step_plots:
+        plt.close()
+
+
+class TreeRenderer:
+    # renders snapshots in the background on a process pool (in this process if workers is 1). a simulation
+    # submits the plots of a step as soon as the step is done and keeps on simulating meanwhile. the pool
+    # workers keep their layouts, so passing one renderer to several runs reuses them across runs
+    def __init__(self, workers: int = None, fig_size: tuple[int, int] = (15, 5), node_size: int = None):
+        self.__fig_size = fig_size
+        self.__node_size = node_size
+        self.__executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+        self.__futures = []
+        self.__paths = []
+
+    def submit(self, snapshot: TreeSnapshot, path: str, fig_size: tuple[int, int] = None, node_size: int = None):
+        # fig_size and node_size default to the ones of the renderer
+        fig_size = self.__fig_size if fig_size is None else fig_size
+        node_size = self.__node_size if node_size is None else node_size
+        if self.__executor is None:
+            self.__paths.append(render_snapshot(snapshot, path, fig_size, node_size))
+        else:
+            self.__futures.append(self.__executor.submit(render_snapshot, snapshot, path, fig_size, node_size))
+
+    def wait(self) -> list[str]:
+        # waits for every submitted plot, returns the paths rendered since the last wait
+        paths = self.__paths + [future.result() for future in self.__futures]
+        self.__paths, self.__futures = [], []
+        return paths
+
+    def close(self):
+        self.wait()
+        if self.__executor is not None:
+            self.__executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def render_snapshots(snapshots_path: str, output_dir: str = None, only: str = None, workers: int = None,
+                     overwrite: bool = False, fig_size: tuple[int, int] = (15, 5), node_size: int = None) -> list[str]:
+    # snapshots_path is a snapshots file or the directory of a run. only is a glob pattern over the relative
+    # plot paths (e.g. 'step-2/*'). plots that already exist are skipped unless overwrite is set
+    snapshots = load_snapshots(snapshots_path)
+    if output_dir is None:
+        output_dir = snapshots_path if os.path.isdir(snapshots_path) else os.path.dirname(snapshots_path)
+    jobs = []
+    for relative_path, snapshot in snapshots.items():
+        path = os.path.join(output_dir, relative_path)
+        if (only is None or fnmatch(relative_path, only)) and (overwrite or not os.path.exists(path)):
+            jobs.append((snapshot, path))
+    if len(jobs) == 0:
+        return []
+    with TreeRenderer(workers, fig_size, node_size) as renderer:
+        for snapshot, path in jobs:
+            renderer.submit(snapshot, path)
+        return renderer.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='render tree snapshots of a headless simulation run')
+    parser.add_argument('snapshots', help='snapshots file or directory of a run')
+    parser.add_argument('--output', default=None, help='output directory, default the directory of the run')
+    parser.add_argument('--only', default=None, help="glob over plot paths, e.g. 'final-decision/*'")
+    parser.add_argument('--workers', type=int, default=None, help='parallel renderers, default all cores')
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+    paths = render_snapshots(args.snapshots, args.output, args.only, args.workers, args.overwrite)
+    print(f'{len(paths)} plots rendered')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import numpy as np
+import os
+import pickle
+
+from classes.message import read_only
+
+# A snapshot keeps what a tree plot shows and nothing else: the node colours in the order of
+# get_decision_colors, one byte each. The tree structure is implied by the process count and the height
+# (classes/eig_index.py), so simulations can record snapshots without matplotlib or networkx and render them
+# later with classes/tree_render.py.
+
+COLORS = ('deepskyblue', 'lawngreen', 'crimson', 'yellow', 'lightgray')
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+SNAPSHOTS_FILE = 'snapshots.pkl'
+
+
+class TreeSnapshot:
+    __slots__ = ('__proc_uid', '__proc_count', '__height', '__color_codes')
+
+    def __init__(self, proc_uid: int, proc_count: int, height: int, color_codes: np.ndarray):
+        self.__proc_uid = proc_uid
+        self.__proc_count = proc_count
+        self.__height = height
+        self.__color_codes = read_only(np.asarray(color_codes, dtype=np.uint8))
+
+    def get_proc_uid(self) -> int:
+        return self.__proc_uid
+
+    def get_proc_count(self) -> int:
+        return self.__proc_count
+
+    def get_tree_height(self) -> int:
+        return self.__height
+
+    def get_color_codes(self) -> np.ndarray:
+        return self.__color_codes
+
+    def get_colors(self) -> list[str]:
+        return [COLORS[code] for code in self.__color_codes.tolist()]
+
+    def __getstate__(self):
+        return self.__proc_uid, self.__proc_count, self.__height, self.__color_codes
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __str__(self):
+        return f'process {self.__proc_uid} of {self.__proc_count}, height: {self.__height}'
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def take_snapshot(tree) -> TreeSnapshot:
+    # works for every tree type that has get_decision_colors (EIGByzTree, ArrayEIGByzTree, AuthEIGByzTree)
+    codes = np.fromiter((COLOR_CODES[color] for color in tree.get_decision_colors()), dtype=np.uint8)
+    return TreeSnapshot(tree.get_proc_uid(), tree.get_proc_count(), tree.get_tree_height(), codes)
+
+
+def save_snapshots(base_path: str, snapshots: dict[str, TreeSnapshot]) -> str:
+    # snapshots maps the path of the plot relative to base_path (e.g. step-1/proc-2.png) to its snapshot
+    os.makedirs(base_path, exist_ok=True)
+    path = os.path.join(base_path, SNAPSHOTS_FILE)
+    with open(path, 'wb') as f:
+        pickle.dump(snapshots, f)
+    return path
+
+
+def load_snapshots(path: str) -> dict[str, TreeSnapshot]:
+    if os.path.isdir(path):
+        path = os.path.join(path, SNAPSHOTS_FILE)
+    with open(path, 'rb') as f:
+        return pickle.load(f)
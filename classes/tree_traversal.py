@@ -0,0 +1,31 @@
+from collections import deque
+from typing import Iterator
+
+# Lazy traversals of node trees (Node, AuthNode). Both keep only the frontier of the walk in memory and
+# visit the children of a node in their order, so level order visits the nodes of a level in EIG slot order.
+
+LEVEL_ORDER = 'level'
+DEPTH_FIRST = 'depth'
+ORDERS = (LEVEL_ORDER, DEPTH_FIRST)
+
+
+def iter_level_order(root) -> Iterator:
+    queue = deque([root])
+    while len(queue) > 0:
+        node = queue.popleft()
+        yield node
+        queue.extend(node.get_children())
+
+
+def iter_depth_first(root) -> Iterator:
+    # pre-order, a node comes before its children
+    stack = [root]
+    while len(stack) > 0:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.get_children()))
+
+
+def check_order(order: str):
+    if order not in ORDERS:
+        raise ValueError(f'unknown traversal order {order}, expected one of {ORDERS}')
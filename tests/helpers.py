@@ -0,0 +1,36 @@
+from classes.Auth.auth_eig_sim import AuthEIGByzSim
+from classes.Auth.auth_process import AuthProcess
+from classes.Auth.signer import get_signer
+from classes.eig_tree import EIGByzTree
+from classes.process import Process
+from classes.sim_random import draw_byz_proc_uids, draw_initial_vals, spawn_rngs
+
+# processes of a seeded simulation, set up like the simulations do (classes/sim_random.py), and the rounds of
+# apply_algo without plotting, for tests that look at the processes and their trees
+
+
+def create_processes(proc_count: int, byz_proc_count: int, seed: int, tree_type: type = EIGByzTree,
+                     lie_prob: int = 50) -> list[Process]:
+    rng, proc_rngs = spawn_rngs(seed, proc_count)
+    byz_uids = draw_byz_proc_uids(rng, proc_count, byz_proc_count)
+    vals = draw_initial_vals(rng, proc_count)
+    return [Process(uid, proc_count, vals[uid - 1], is_byz=uid in byz_uids, lie_prob=lie_prob, tree_type=tree_type,
+                    rng=proc_rngs[uid - 1]) for uid in range(1, proc_count + 1)]
+
+
+def create_auth_processes(proc_count: int, byz_proc_count: int, seed: int, lie_prob: int = 50,
+                          **kwargs) -> list[AuthProcess]:
+    # kwargs go to AuthEIGByzSim, e.g. chain_format or verify_threads
+    return AuthEIGByzSim(proc_count, byz_proc_count, byz_prob=lie_prob, signer=get_signer('hmac'), seed=seed,
+                         **kwargs).get_processes()
+
+
+def run_rounds(processes: list, step_number: int):
+    for round_number in range(1, step_number + 1):
+        round_msgs = [p.generate_round_msg() for p in processes]
+        for receiver in processes:
+            receiver.receive_msgs([p.generate_msg(msg) for p, msg in zip(processes, round_msgs)])
+        for p in processes:
+            p.add_tree_level()
+        for p in processes:
+            p.apply_msgs(round_number)
@@ -0,0 +1,32 @@
+import pytest
+
+from classes.batched_eig_sim import BatchedEIGByzSim
+from classes.eig_sim import EIGByzSim
+
+# the batched simulation stacks the trees of all processes, for the same seed it has to draw the same setup and
+# tell the same lies as EIGByzSim, and so reach the same decisions
+
+CASES = [(4, 1, 0, 50), (5, 1, 1, 100), (6, 2, 2, 50), (7, 2, 3, 10), (7, 3, 4, 50), (8, 3, 5, 30)]
+
+
+@pytest.mark.parametrize('proc_count, byz_proc_count, seed, byz_prob', CASES)
+def test_same_as_eig_sim(proc_count, byz_proc_count, seed, byz_prob):
+    for step_number in (1, byz_proc_count + 1):
+        batched = BatchedEIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, seed=seed)
+        sim = EIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, seed=seed)
+        assert batched.get_byz_proc() == sim.get_byz_proc()
+        assert batched.get_proc_initial_vals() == sim.get_proc_initial_vals()
+        assert batched.apply_algo(step_number=step_number) == \
+               sim.apply_algo(save_step_plot=False, save_decision_plot=False, base_path=None, step_number=step_number)
+        assert batched.check_requirements() == sim.check_requirements()
+
+
+@pytest.mark.parametrize('proc_count, byz_proc_count, seed, byz_prob', CASES)
+def test_same_seed_same_run(proc_count, byz_proc_count, seed, byz_prob):
+    runs = []
+    for _ in range(2):
+        batched = BatchedEIGByzSim(proc_count, byz_proc_count, byz_prob=byz_prob, seed=seed)
+        batched.apply_algo()
+        runs.append((batched.get_byz_proc(), batched.get_proc_initial_vals(), batched.get_final_decision(),
+                     [level.tolist() for level in batched.get_levels()]))
+    assert runs[0] == runs[1]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from classes.array_eig_tree import ArrayEIGByzTree
+from classes.eig_tree import EIGByzTree
+from classes.message import FrontierMessage
+from classes.sparse_eig_tree import SparseEIGByzTree
+from tests.helpers import create_auth_processes, create_processes, run_rounds
+
+# the recursive decide of the node trees (Node.decide, AuthNode.decide) is the reference, the vectorized
+# decide has to give every node the same decision, before and after the decisions are written to the nodes
+
+
+def build_tree(proc_count: int, height: int, seed: int) -> EIGByzTree:
+    rng = np.random.default_rng(seed)
+    tree = EIGByzTree(1, proc_count, int(rng.integers(0, 2)))
+    for level in range(height):
+        tree.add_level()
+        for sender in range(1, proc_count + 1):
+            vals = rng.integers(0, 2, size=tree.get_level_size(level), dtype=np.int8)
+            tree.apply_msg(FrontierMessage(vals, sender=sender, proc_count=proc_count, level=level))
+    return tree
+
+
+def get_decisions(tree) -> list[list[int]]:
+    return [tree.get_level_decisions(level).tolist() for level in range(tree.get_tree_height() + 1)]
+
+
+@pytest.mark.parametrize('proc_count, height, seed', [(4, 1, 0), (5, 2, 1), (6, 3, 2), (7, 3, 3)])
+def test_eig_tree(proc_count, height, seed):
+    recursive, vectorized = build_tree(proc_count, height, seed), build_tree(proc_count, height, seed)
+    assert recursive.decide(vectorized=False) == vectorized.decide(vectorized=True)
+    assert get_decisions(vectorized) == get_decisions(recursive)
+    assert vectorized.get_decision_colors() == recursive.get_decision_colors()
+    assert [node.get_decision() for node in vectorized.iter_nodes()] == \
+           [node.get_decision() for node in recursive.iter_nodes()]
+
+
+@pytest.mark.parametrize('tree_type', [EIGByzTree, ArrayEIGByzTree, SparseEIGByzTree])
+@pytest.mark.parametrize('proc_count, byz_proc_count, seed', [(4, 1, 0), (5, 2, 1), (6, 2, 2)])
+def test_processes(tree_type, proc_count, byz_proc_count, seed):
+    recursive, vectorized = (create_processes(proc_count, byz_proc_count, seed, tree_type) for _ in range(2))
+    run_rounds(recursive, byz_proc_count + 1)
+    run_rounds(vectorized, byz_proc_count + 1)
+    for p, q in zip(recursive, vectorized):
+        assert p.decide(vectorized=False) == q.decide(vectorized=True)
+        assert (p.get_tree_snapshot().get_color_codes() == q.get_tree_snapshot().get_color_codes()).all()
+
+
+@pytest.mark.parametrize('proc_count, byz_proc_count, seed', [(4, 1, 0), (5, 2, 1), (6, 2, 2)])
+def test_auth_processes(proc_count, byz_proc_count, seed):
+    recursive, vectorized = (create_auth_processes(proc_count, byz_proc_count, seed) for _ in range(2))
+    run_rounds(recursive, byz_proc_count + 1)
+    run_rounds(vectorized, byz_proc_count + 1)
+    for p, q in zip(recursive, vectorized):
+        assert p.decide(vectorized=False) == q.decide(vectorized=True)
+        assert get_decisions(q.get_tree()) == get_decisions(p.get_tree())
+        assert q.get_tree().get_decision_colors() == p.get_tree().get_decision_colors()
+        assert [node.get_decision() for node in q.get_tree().iter_nodes()] == \
+               [node.get_decision() for node in p.get_tree().iter_nodes()]
@@ -0,0 +1,35 @@
+import pytest
+
+from classes.sweep import create_sim, ENGINES, run_sim
+
+# a seed fixes everything a run draws: the byzantine processes, the initial values and every lie, so two runs
+# with the same seed end the same, also when the phases of the run are spread on workers
+
+
+def run(engine: str, seed, workers: int = None) -> tuple:
+    sim = create_sim(engine, 7, 2, 50, 'hmac', seed)
+    setup = sim.get_byz_proc(), sim.get_proc_initial_vals()
+    if workers is None:
+        decisions = run_sim(sim, engine, None)
+    else:
+        decisions = sim.apply_algo(save_step_plot=False, save_decision_plot=False, base_path=None, workers=workers)
+    return setup, decisions
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('seed', [0, 11, [3, 5]])
+def test_same_seed_same_run(engine, seed):
+    assert run(engine, seed) == run(engine, seed)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_seed_changes_run(engine):
+    assert len({str(run(engine, seed)) for seed in range(5)}) > 1
+
+
+@pytest.mark.parametrize('engine', [engine for engine in ENGINES if engine != 'batched'])
+@pytest.mark.parametrize('seed', [0, 11])
+def test_workers_same_run(engine, seed):
+    local = run(engine, seed)
+    for workers in (1, 2, 3):
+        assert run(engine, seed, workers) == local
@@ -0,0 +1,59 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from classes.eig_index import get_append_slots, get_level_paths, get_level_size, get_level_slots, rank_path, \
+    rank_paths, unrank_path
+
+# the slots of a level are the repetition-free paths of proc uids in lexicographic order, which is what
+# itertools.permutations enumerates; every index function is checked against that enumeration
+
+CASES = [(proc_count, level) for proc_count in range(1, 6) for level in range(proc_count + 1)]
+
+
+def enumerate_paths(proc_count: int, level: int) -> list[tuple[int, ...]]:
+    return list(permutations(range(1, proc_count + 1), level))
+
+
+@pytest.mark.parametrize('proc_count, level', CASES)
+def test_level_paths(proc_count, level):
+    paths = enumerate_paths(proc_count, level)
+    assert get_level_size(proc_count, level) == len(paths)
+    assert [tuple(path) for path in get_level_paths(proc_count, level).tolist()] == paths
+
+
+@pytest.mark.parametrize('proc_count, level', CASES)
+def test_rank_path(proc_count, level):
+    paths = enumerate_paths(proc_count, level)
+    assert [rank_path(proc_count, path) for path in paths] == list(range(len(paths)))
+    assert [unrank_path(proc_count, level, rank) for rank in range(len(paths))] == [list(path) for path in paths]
+    if level > 0:
+        assert rank_paths(proc_count, np.array(paths)).tolist() == list(range(len(paths)))
+
+
+def test_rank_invalid_paths():
+    assert rank_path(4, (1, 1)) is None
+    assert rank_path(4, (0, 2)) is None
+    assert rank_path(4, (5,)) is None
+    assert rank_paths(4, np.array([[1, 2], [2, 2], [1, 5], [4, 3]])).tolist() == [0, -1, -1, 11]
+
+
+@pytest.mark.parametrize('proc_count, level', [case for case in CASES if case[1] > 0])
+def test_level_slots(proc_count, level):
+    parents, uids, masks = get_level_slots(proc_count, level)
+    parent_paths = enumerate_paths(proc_count, level - 1)
+    for path, parent, uid, mask in zip(enumerate_paths(proc_count, level), parents.tolist(), uids.tolist(),
+                                       masks.tolist()):
+        assert parent_paths[parent] == path[:-1]
+        assert uid == path[-1]
+        assert mask == sum(1 << p for p in path)
+
+
+@pytest.mark.parametrize('proc_count, level', [case for case in CASES if case[1] < case[0]])
+def test_append_slots(proc_count, level):
+    children = {path: slot for slot, path in enumerate(enumerate_paths(proc_count, level + 1))}
+    for sender in range(1, proc_count + 1):
+        expected = [-1 if sender in path else children[path + (sender,)]
+                    for path in enumerate_paths(proc_count, level)]
+        assert get_append_slots(proc_count, level, sender).tolist() == expected
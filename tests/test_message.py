@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from classes.Auth.auth_message import AuthFrontierMessage, AuthMessage, AuthMessageContent
+from classes.Auth.signature_chain import CHAIN_FORMATS
+from classes.eig_index import NO_VAL
+from classes.message import FrontierMessage, Message, MessageContent
+from tests.helpers import create_auth_processes, create_processes, run_rounds
+
+# get_serialized_size computes the length of serialize() without building it, for every message type and
+# every kind of content: root and relayed paths, None values, no chain, nested chains and flat chains
+
+NESTED = b'signed blob'
+FLAT = (b'hop one', b'second hop')
+
+
+def get_messages() -> list:
+    return [
+        Message([], sender=1),
+        Message([MessageContent([], 1), MessageContent([-1, 2], 0), MessageContent([-1, 2, 3], None)], sender=3,
+                round_number=3),
+        FrontierMessage(np.array([], dtype=np.int8), sender=1, proc_count=4, level=0),
+        FrontierMessage(np.array([0, 1, NO_VAL, 1], dtype=np.int8), sender=2, proc_count=4, level=1),
+        AuthMessage([AuthMessageContent([], 1, None), AuthMessageContent([-1, 2], 0, NESTED),
+                     AuthMessageContent([-1, 2, 1], None, FLAT)], sender=4, round_number=2),
+        AuthFrontierMessage(np.array([1, NO_VAL, 0, 1], dtype=np.int8), [NESTED, None, FLAT, (b'',)], sender=1,
+                            proc_count=4, level=1),
+        AuthFrontierMessage(np.array([1, 0, 0, 1, 1], dtype=np.int8), [NESTED, FLAT, None, NESTED, FLAT],
+                            sender=2, proc_count=5, level=1, present=np.array([True, False, True, False, True])),
+    ]
+
+
+@pytest.mark.parametrize('msg', get_messages(), ids=lambda msg: type(msg).__name__)
+def test_serialized_size(msg):
+    assert len(msg.serialize()) == msg.get_serialized_size()
+
+
+def test_simulated_messages():
+    processes = create_processes(5, 2, 0)
+    run_rounds(processes, 2)
+    for p in processes:
+        msg = p.generate_msg()
+        assert len(msg.serialize()) == msg.get_serialized_size()
+
+
+@pytest.mark.parametrize('chain_format', CHAIN_FORMATS)
+def test_simulated_auth_messages(chain_format):
+    processes = create_auth_processes(5, 2, 0, chain_format=chain_format)
+    run_rounds(processes, 2)
+    for p in processes:
+        msg = p.generate_msg()
+        content_msg = AuthMessage(msg.get_content(), sender=msg.get_sender(), round_number=msg.get_round_number())
+        for m in (msg, content_msg):
+            assert len(m.serialize()) == m.get_serialized_size()
@@ -0,0 +1,21 @@
+import numpy as np
+
+from classes.eig_index import NO_VAL
+from classes.message import FrontierMessage
+from classes.process import Process
+
+# a byzantine process lies by flipping known values, a slot it has no value for (NO_VAL) stays unknown
+
+
+def test_lies_stay_binary():
+    vals = np.array([0, 1, NO_VAL, 1, NO_VAL, 0], dtype=np.int8)
+    round_msg = FrontierMessage(vals, sender=1, proc_count=6, level=1)
+    p = Process(1, 6, 0, is_byz=True, lie_prob=100, rng=np.random.default_rng(0))
+    lied = p.generate_msg(round_msg).get_vals()
+    assert lied.tolist() == [1, 0, NO_VAL, 0, NO_VAL, 1]
+    assert round_msg.get_vals().tolist() == vals.tolist()
+
+
+def test_honest_msg_is_shared():
+    round_msg = FrontierMessage(np.array([0, NO_VAL], dtype=np.int8), sender=1, proc_count=3, level=1)
+    assert Process(1, 3, 0, lie_prob=100).generate_msg(round_msg) is round_msg
@@ -0,0 +1,41 @@
+import pytest
+
+from classes.sweep import create_sim
+
+# a run on workers (classes/sim_shards.py) has to end the same as a run in the simulating process, with the
+# state of every process copied back into the objects the simulation holds
+
+
+def run(engine: str, proc_count: int, byz_proc_count: int, seed: int, workers: int = None):
+    sim = create_sim(engine, proc_count, byz_proc_count, 50, 'hmac', seed)
+    sim.apply_algo(save_step_plot=False, save_decision_plot=False, base_path=None, workers=workers)
+    return sim
+
+
+@pytest.mark.parametrize('engine', ['object', 'array', 'sparse', 'auth'])
+@pytest.mark.parametrize('proc_count, byz_proc_count, seed', [(4, 1, 0), (6, 2, 1)])
+def test_same_as_local(engine, proc_count, byz_proc_count, seed):
+    local = run(engine, proc_count, byz_proc_count, seed)
+    for workers in (2, 3):
+        sharded = run(engine, proc_count, byz_proc_count, seed, workers)
+        assert sharded.get_final_decision() == local.get_final_decision()
+        assert sharded.check_requirements() == local.check_requirements()
+
+
+def test_processes_stay_valid():
+    sim = create_sim('auth', 5, 1, 50, 'hmac', 2)
+    processes = list(sim.get_processes())
+    sim.apply_algo(save_step_plot=False, save_decision_plot=False, base_path=None, workers=2)
+    local = run('auth', 5, 1, 2)
+    assert sim.get_processes() == processes
+    assert [p.get_decision() for p in processes] == local.get_final_decision()
+    assert [p.get_tree().get_tree_height() for p in processes] == [2] * 5
+    # the copies of the workers are merged into the shared verification state
+    assert all(p.get_verification_cache() is sim.get_verification_cache() for p in processes)
+    assert sim.get_verification_log().get_verified_count() == local.get_verification_log().get_verified_count()
+    assert sim.get_verification_cache().get_size() == local.get_verification_cache().get_size()
+
+
+def test_show_step_plots_with_workers():
+    with pytest.raises(ValueError):
+        create_sim('object', 4, 1, 50, seed=0).apply_algo(show_step_plots=True, base_path=None, workers=2)
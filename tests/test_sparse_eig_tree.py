@@ -0,0 +1,41 @@
+import pytest
+
+from classes.array_eig_tree import ArrayEIGByzTree
+from classes.eig_tree import EIGByzTree
+from classes.sparse_eig_tree import SparseEIGByzTree
+from tests.helpers import create_processes, run_rounds
+
+# every tree type has to hold and decide the same values as an array tree of the same run; a sparse tree only
+# keeps the values that differ from their parent, a node tree keeps Node objects
+
+
+def get_trees(processes: list) -> list:
+    # the decision of every process and the decisions of every node, as the processes would plot them
+    trees = []
+    for p in processes:
+        snapshot = p.get_tree_snapshot()
+        trees.append((p.get_decision(), snapshot.get_tree_height(), snapshot.get_color_codes().tolist()))
+    return trees
+
+
+@pytest.mark.parametrize('tree_type', [EIGByzTree, SparseEIGByzTree])
+@pytest.mark.parametrize('proc_count, byz_proc_count, lie_prob, seed',
+                         [(4, 1, 50, 0), (5, 2, 50, 1), (6, 2, 100, 2), (7, 2, 10, 3), (7, 3, 0, 4)])
+def test_same_as_array_tree(tree_type, proc_count, byz_proc_count, lie_prob, seed):
+    runs = []
+    for run_tree_type in (ArrayEIGByzTree, tree_type):
+        processes = create_processes(proc_count, byz_proc_count, seed, run_tree_type, lie_prob)
+        run_rounds(processes, byz_proc_count + 1)
+        for p in processes:
+            p.decide()
+        runs.append(get_trees(processes))
+    assert runs[0] == runs[1]
+
+
+@pytest.mark.parametrize('tree_type', [EIGByzTree, SparseEIGByzTree])
+def test_frontier_vals(tree_type):
+    array, other = (create_processes(6, 2, 5, run_tree_type) for run_tree_type in (ArrayEIGByzTree, tree_type))
+    run_rounds(array, 3)
+    run_rounds(other, 3)
+    for p, q in zip(array, other):
+        assert p.generate_round_msg().get_vals().tolist() == q.generate_round_msg().get_vals().tolist()
@@ -0,0 +1,34 @@
+from classes.sweep import get_scenarios, is_valid_scenario, run_sweep
+
+
+def test_is_valid_scenario():
+    assert is_valid_scenario(4, 1)
+    assert is_valid_scenario(4, 3)  # f + 1 = 4 rounds
+    assert not is_valid_scenario(4, 4)  # f + 1 rounds would need a fifth level
+    assert is_valid_scenario(4, 4, 2)
+    assert not is_valid_scenario(4, 5, 2)
+    assert not is_valid_scenario(4, 1, 0)
+    assert not is_valid_scenario(4, 1, 5)
+
+
+def test_get_scenarios():
+    scenarios = get_scenarios('object', [3, 4], [1, 3], None, [50], 2, seed=0)
+    assert [scenario[1:4] for scenario in scenarios] == [(3, 1, 2), (4, 1, 2), (4, 3, 4)]
+    scenarios = get_scenarios('object', [3], [1, 4], [1, 3, 4], [50], 2, seed=0)
+    assert [scenario[1:4] for scenario in scenarios] == [(3, 1, 1), (3, 1, 3)]
+
+
+def test_signer_only_for_auth():
+    assert {scenario[6] for scenario in get_scenarios('array', [4], [1], None, [50], 1, 'hmac', 0)} == {None}
+    assert {scenario[6] for scenario in get_scenarios('auth', [4], [1], None, [50], 1, 'hmac', 0)} == {'hmac'}
+
+
+def test_resume_ignores_signer_of_other_engines(tmp_path):
+    output_path = str(tmp_path / 'sweep.csv')
+    rows = run_sweep([4], [1], repetitions=2, output_path=output_path, engine='array', workers=1, signer='hmac',
+                     seed=0)
+    assert [row['signer'] for row in rows] == ['']
+    assert run_sweep([4], [1], repetitions=2, output_path=output_path, engine='array', workers=1,
+                     signer='ed25519', seed=0) == []
+    assert len(run_sweep([4], [1], repetitions=2, output_path=output_path, engine='auth', workers=1,
+                         signer='hmac', seed=0)) == 1
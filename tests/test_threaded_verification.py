@@ -0,0 +1,45 @@
+import pytest
+
+from classes.Auth.signature_chain import CHAIN_FORMATS, NESTED_CHAIN
+from tests.helpers import create_auth_processes
+
+# checking the signatures of a round on several threads (verify_threads) has to accept and reject the same
+# contents as checking them one by one. the run has byzantine lies (relayed lies keep the original signature,
+# which does not match their value) and forged signatures on some contents of one message
+
+
+def forge(msg, chain_format: str, slots: list[int]):
+    forged = b'forged' if chain_format == NESTED_CHAIN else (b'forged',)
+    return msg.replace_vals({i: (int(msg.get_vals()[i]), forged) for i in slots})
+
+
+def run(verify_threads: int, chain_format: str) -> tuple:
+    processes = create_auth_processes(5, 2, 7, lie_prob=30, chain_format=chain_format,
+                                      verify_threads=verify_threads)
+    for round_number in (1, 2, 3):
+        round_msgs = [p.generate_round_msg() for p in processes]
+        for receiver in processes:
+            msgs = [p.generate_msg(msg) for p, msg in zip(processes, round_msgs)]
+            if round_number > 1 and receiver.get_proc_uid() == 1:
+                msgs[1] = forge(msgs[1], chain_format, [0, 2, 4])
+            receiver.receive_msgs(msgs)
+        for p in processes:
+            p.add_tree_level()
+        for p in processes:
+            p.apply_msgs(round_number)
+    log = processes[0].get_verification_log()
+    # keys differ between runs, so failures are compared without the message of the backend
+    failures = sorted((f.receiver, f.sender, f.round_number, f.path, f.signer_uid, f.reason.split(':')[0])
+                      for f in log.get_failures())
+    trees = [p.get_tree_snapshot().get_color_codes().tolist() for p in processes]
+    return [p.decide() for p in processes], trees, failures, log.get_verified_count()
+
+
+@pytest.mark.parametrize('chain_format', CHAIN_FORMATS)
+def test_same_as_sequential(chain_format):
+    sequential = run(1, chain_format)
+    threaded = run(4, chain_format)
+    assert threaded == sequential
+    failures = sequential[2]
+    assert any(f[:2] == (1, 2) and f[4] == 2 for f in failures)  # the forged signatures of sender 2
+    assert any(f[:2] != (1, 2) for f in failures)  # the relayed lies
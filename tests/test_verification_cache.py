@@ -0,0 +1,103 @@
+import pickle
+
+import pytest
+
+from classes.Auth.signature_chain import extend_chain, FLAT_CHAIN, NESTED_CHAIN
+from classes.Auth.signer import get_signer
+from classes.Auth.verification_cache import ChainVerificationError, VerificationCache
+
+SIGNER = get_signer('hmac')
+KEYS = [SIGNER.generate_keys() for _ in range(4)]  # (verify key, sign key) of uids 1..4
+PUBLIC_KEYS = [pub_key for pub_key, _ in KEYS]
+
+
+def build_chain(chain_format: str, val, signers: tuple[int, ...], sign_uids: tuple[int, ...] = None):
+    # sign_uids are the uids whose keys sign every hop, the signers themselves unless a hop is forged
+    chain = None
+    for hop, uid in enumerate(signers if sign_uids is None else sign_uids, start=1):
+        chain = extend_chain(SIGNER, chain_format, KEYS[uid - 1][1], val, chain, signers[:hop])
+    return chain
+
+
+def verify(cache: VerificationCache, chain_format: str, val, signers: tuple[int, ...], chain):
+    if chain_format == NESTED_CHAIN:
+        return cache.verify_chain(SIGNER, PUBLIC_KEYS, signers, chain)
+    cache.verify_flat_chain(SIGNER, PUBLIC_KEYS, signers, val, chain)
+    return val
+
+
+def test_lru_eviction():
+    # one hop flat chains take one entry each, a hit makes an entry the most recent one
+    cache = VerificationCache(maxsize=2)
+    chains = {uid: build_chain(FLAT_CHAIN, 1, (uid,)) for uid in (1, 2, 3)}
+
+    def lookup(uid):
+        verify(cache, FLAT_CHAIN, 1, (uid,), chains[uid])
+        return cache.get_hits(), cache.get_misses()
+
+    assert lookup(1) == (0, 1)
+    assert lookup(2) == (0, 2)
+    assert lookup(1) == (1, 2)
+    assert lookup(3) == (1, 3)  # evicts 2, the least recent
+    assert lookup(1) == (2, 3)
+    assert lookup(2) == (2, 4)  # evicts 3
+    assert lookup(3) == (2, 5)
+    assert cache.get_size() == 2
+
+
+def test_nested_prefix_reuse():
+    cache = VerificationCache()
+    verify(cache, NESTED_CHAIN, 1, (1, 2), build_chain(NESTED_CHAIN, 1, (1, 2)))
+    assert (cache.get_hits(), cache.get_misses()) == (0, 2)
+    # the chain of (1, 2, 3) wraps the one of (1, 2), only its last layer is new
+    assert verify(cache, NESTED_CHAIN, 1, (1, 2, 3), build_chain(NESTED_CHAIN, 1, (1, 2, 3))) == 1
+    assert (cache.get_hits(), cache.get_misses()) == (1, 3)
+
+
+@pytest.mark.parametrize('val', [0, 1, None])
+def test_flat_same_as_nested(val):
+    for signers in [(1,), (2, 1), (1, 3, 4), (4, 3, 2, 1)]:
+        for chain_format in (NESTED_CHAIN, FLAT_CHAIN):
+            assert verify(VerificationCache(), chain_format, val, signers, build_chain(chain_format, val, signers)) \
+                   == val
+
+
+@pytest.mark.parametrize('forged_hop', [1, 2, 3])
+def test_flat_same_as_nested_forged(forged_hop):
+    # hop forged_hop is signed with the key of uid 4, both formats blame the signer of that hop, also when
+    # the failure is found in the cache
+    signers = (1, 2, 3)
+    sign_uids = tuple(4 if hop == forged_hop else uid for hop, uid in enumerate(signers, start=1))
+    for chain_format in (NESTED_CHAIN, FLAT_CHAIN):
+        cache = VerificationCache()
+        chain = build_chain(chain_format, 1, signers, sign_uids)
+        for _ in range(2):
+            with pytest.raises(ChainVerificationError) as e:
+                verify(cache, chain_format, 1, signers, chain)
+            assert e.value.signer_uid == signers[forged_hop - 1]
+        assert cache.get_hits() > 0
+
+
+def test_flat_wrong_val():
+    chain = build_chain(FLAT_CHAIN, 1, (1, 2))
+    with pytest.raises(ChainVerificationError) as e:
+        verify(VerificationCache(), FLAT_CHAIN, 0, (1, 2), chain)
+    assert e.value.signer_uid == 1
+
+
+def test_merge():
+    cache = VerificationCache()
+    chains = {uid: build_chain(FLAT_CHAIN, 1, (uid,)) for uid in (1, 2)}
+    verify(cache, FLAT_CHAIN, 1, (1,), chains[1])
+    # a copy used elsewhere, like the one of a worker process
+    copy = pickle.loads(pickle.dumps(cache))
+    since = cache.get_hits(), cache.get_misses()
+    verify(copy, FLAT_CHAIN, 1, (1,), chains[1])
+    verify(copy, FLAT_CHAIN, 1, (2,), chains[2])
+    verify(cache, FLAT_CHAIN, 1, (1,), chains[1])
+    cache.merge(copy, since)
+    assert (cache.get_hits(), cache.get_misses(), cache.get_size()) == (2, 2, 2)
+    cache.merge(cache, since)
+    assert (cache.get_hits(), cache.get_misses(), cache.get_size()) == (2, 2, 2)
+    verify(cache, FLAT_CHAIN, 1, (2,), chains[2])  # found in the entries of the copy
+    assert (cache.get_hits(), cache.get_misses()) == (3, 2)